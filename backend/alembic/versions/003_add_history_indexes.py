@@ -0,0 +1,26 @@
+"""add history indexes
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Keyset pagination walks (created_at, id) backwards, optionally per user or quality
+    op.create_index('ix_animations_created_at_id', 'animations', ['created_at', 'id'])
+    op.create_index('ix_animations_user_id_created_at_id', 'animations', ['user_id', 'created_at', 'id'])
+    op.create_index('ix_animations_quality_created_at_id', 'animations', ['quality', 'created_at', 'id'])
+
+def downgrade() -> None:
+    op.drop_index('ix_animations_quality_created_at_id', table_name='animations')
+    op.drop_index('ix_animations_user_id_created_at_id', table_name='animations')
+    op.drop_index('ix_animations_created_at_id', table_name='animations')
@@ -1,17 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.core.config import settings
 from app.core.database import get_db
-from app.services.gpt_service import gpt_service
-from app.services.manim_service import manim_service
 from app.services.animation_service import AnimationService
+from app.services.job_service import job_service, TERMINAL_PHASES
 from app.models.animation import (
     AnimationRequest, 
-    AnimationResponse, 
     AnimationError,
-    AnimationHistoryResponse
+    AnimationHistoryResponse,
+    AnimationHistoryPage,
+    AnimationJobResponse,
+    AnimationJobStatus
 )
-import time
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,81 +23,122 @@ router = APIRouter(prefix="/animations", tags=["animations"])
 # Create a singleton instance
 animation_service = AnimationService()
 
-@router.post("", response_model=AnimationResponse)
-async def create_animation(
-    request: AnimationRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    start_time = time.time()
-    try:
-        # Validate input
-        if not request.description.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Description cannot be empty"
-            )
-
-        # Convert natural language to Manim code
-        manim_code = await gpt_service.generate_manim_code(request.description)
-        
-        # Store in database
-        db_animation = await animation_service.create_animation(
-            db=db,
-            request=request,
-            manim_code=manim_code
-        )
-        
-        # Generate animation using the instance
-        animation_url = await manim_service.create_animation(
-            manim_code=manim_code,
-            animation_id=db_animation.id,
-            quality=request.quality
+@router.post("", response_model=AnimationJobResponse, status_code=202)
+async def create_animation(request: AnimationRequest):
+    """Queue an animation for rendering and return its job id."""
+    # Validate input
+    if not request.description.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Description cannot be empty"
         )
-        
-        # Update animation URL in database
-        db_animation.animation_url = animation_url
-        db_animation.quality = request.quality
-        db.commit()
-        
-        # Add cleanup task to background tasks
-        background_tasks.add_task(
-            animation_service.cleanup_old_files
+
+    try:
+        job = await job_service.enqueue(request)
+    except Exception as e:
+        logger.error(f"Failed to enqueue animation job: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Animation queue is unavailable"
         )
-        
-        processing_time = time.time() - start_time
-        return AnimationResponse(
-            status="success",
-            animation_url=animation_url,
-            processing_time=processing_time,
-            quality=request.quality
+
+    return AnimationJobResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        status_url=f"{settings.API_V1_STR}/animations/jobs/{job['job_id']}",
+        events_url=f"{settings.API_V1_STR}/animations/jobs/{job['job_id']}/events"
+    )
+
+@router.get("/jobs/{job_id}", response_model=AnimationJobStatus)
+async def get_animation_job(job_id: str):
+    """Get the status and result of an animation job."""
+    job = await job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
         )
 
-    except Exception as e:
-        logger.error(f"Animation creation failed: {str(e)}")
+    return AnimationJobStatus(**job)
+
+@router.get("/jobs/{job_id}/events")
+async def stream_animation_job_events(job_id: str, request: Request):
+    """Stream a job's progress as server-sent events until it completes or fails.
+
+    Every event is replayed from the start, or from after Last-Event-ID
+    when a client reconnects.
+    """
+    if await job_service.get_job(job_id) is None:
         raise HTTPException(
-            status_code=500,
-            detail=str(e)
+            status_code=404,
+            detail="Job not found"
         )
 
-@router.get("/history", response_model=List[AnimationHistoryResponse])
+    last_event_id = request.headers.get("last-event-id", "")
+    after = int(last_event_id) if last_event_id.isdigit() else 0
+
+    async def event_stream():
+        async for seq, event in job_service.stream_events(job_id, after=after):
+            if event is None:
+                job = await job_service.get_job(job_id)
+                if job is None:
+                    # The job expired without finishing
+                    return
+                if job["status"] in TERMINAL_PHASES:
+                    # The job finished but its final event never arrived
+                    # (e.g. publishing it failed); end with one built from the record
+                    event = {"phase": job["status"], "timestamp": job["finished_at"]}
+                    if job["status"] == "completed":
+                        event["result"] = job["result"]
+                    else:
+                        event["error"] = job["error"]
+                    yield f"event: {event['phase']}\ndata: {json.dumps(event)}\n\n"
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {seq}\nevent: {event['phase']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/history", response_model=AnimationHistoryPage)
 async def get_animation_history(
-    limit: int = 10,
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+    quality: Optional[str] = Query(None, pattern="^(low|medium|high)$"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get recent animation history."""
+    """Get animation history, newest first, one page at a time."""
     try:
-        animations = await animation_service.get_recent_animations(db, limit)
-        return [
-            AnimationHistoryResponse(
-                id=anim.id,
-                description=anim.description,
-                url=anim.animation_url,
-                created_at=anim.created_at,
-                quality=anim.quality
-            )
-            for anim in animations
-        ]
+        animations, next_cursor = await animation_service.get_animation_history(
+            db,
+            limit=limit,
+            cursor=cursor,
+            user_id=user_id,
+            quality=quality
+        )
+        return AnimationHistoryPage(
+            items=[
+                AnimationHistoryResponse(
+                    id=anim.id,
+                    description=anim.description,
+                    url=anim.animation_url,
+                    created_at=anim.created_at,
+                    quality=anim.quality
+                )
+                for anim in animations
+            ],
+            next_cursor=next_cursor
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid cursor"
+        )
     except Exception as e:
         logger.error(f"Failed to get animation history: {str(e)}")
         raise HTTPException(
@@ -104,7 +148,7 @@ async def get_animation_history(
 
 @router.get("/stats", response_model=dict)
 async def get_animation_stats(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get animation statistics."""
     try:
@@ -120,12 +164,17 @@ async def get_animation_stats(
 @router.delete("/history/{animation_id}")
 async def delete_animation(
     animation_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete an animation from history."""
     try:
         await animation_service.delete_animation(db, animation_id)
         return {"status": "success", "message": "Animation deleted"}
+    except ValueError:
+        raise HTTPException(
+            status_code=404,
+            detail="Animation not found"
+        )
     except Exception as e:
         logger.error(f"Failed to delete animation: {str(e)}")
         raise HTTPException(
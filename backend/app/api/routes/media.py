@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Request
+from app.services.media_service import media_service
+
+router = APIRouter(prefix="/storage", tags=["media"])
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_media(path: str, request: Request):
+    """Serve a stored animation, rendition or stream segment."""
+    return await media_service.serve(path, request)
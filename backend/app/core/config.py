@@ -1,48 +1,48 @@
 from pydantic_settings import BaseSettings
+import hashlib
 import os
 from typing import List, Dict
 from datetime import datetime, timedelta
 
+def hash_api_key(key: str) -> bytes:
+    """SHA-256 of an API key, used to index and compare keys."""
+    return hashlib.sha256(key.encode()).digest()
+
 class APIKey:
-    def __init__(self, key: str, rate_limit: int, expires_at: datetime = None):
+    def __init__(self, key: str, units_per_minute: int, expires_at: datetime = None):
         self.key = key
-        self.rate_limit = rate_limit  # requests per minute
+        self.key_digest = hash_api_key(key)
+        # Rate limit in cost units; a plain request costs 1, the routes in
+        # RATE_LIMIT_ROUTE_COSTS more. Also the key's burst size
+        self.units_per_minute = units_per_minute
         self.expires_at = expires_at
-        self.last_used = None
-        self.request_count = 0
 
     def is_valid(self) -> bool:
         if self.expires_at and datetime.utcnow() > self.expires_at:
             return False
         return True
 
-    def can_make_request(self) -> bool:
-        now = datetime.utcnow()
-        if not self.last_used:
-            self.last_used = now
-            self.request_count = 1
-            return True
-        
-        # Reset counter if minute has passed
-        if (now - self.last_used) > timedelta(minutes=1):
-            self.request_count = 0
-            self.last_used = now
-        
-        if self.request_count >= self.rate_limit:
-            return False
-        
-        self.request_count += 1
-        return True
-
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Math Animator"
     API_V1_STR: str = "/api/v1"
     
     # OpenAI Configuration
     OPENAI_API_KEY: str
+    OPENAI_BASE_URL: str = ""  # e.g. a proxy or the local fake server in tests/
+    OPENAI_REQUEST_TIMEOUT: float = 60.0  # seconds per attempt
+    OPENAI_MAX_CONCURRENT_REQUESTS: int = 8  # in-flight LLM calls per process
+    OPENAI_MAX_CONNECTIONS: int = 20
+    OPENAI_RETRY_BASE_DELAY: float = 0.5  # seconds
+    OPENAI_RETRY_MAX_DELAY: float = 8.0  # seconds
     
     # Database Configuration
-    DATABASE_URL: str
+    DATABASE_URL: str  # postgresql:// URLs are served through asyncpg
+    DB_POOL_SIZE: int = 10  # connections kept open per process
+    DB_MAX_OVERFLOW: int = 20  # extra connections allowed under bursts
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True  # check connections before use so restarts don't surface as errors
+    DB_STATEMENT_CACHE_SIZE: int = 500  # prepared statements per connection; 0 behind pgbouncer in transaction mode
     
     # Security
     SECRET_KEY: str
@@ -52,23 +52,98 @@ class Settings(BaseSettings):
     API_KEYS: Dict[str, APIKey] = {
         "development": APIKey(
             key="dev_key_123",
-            rate_limit=100,  # 100 requests per minute
+            units_per_minute=2000,  # 100 animation POSTs or 2000 plain requests per minute
             expires_at=None  # Never expires
         ),
         "production": APIKey(
             key="prod_key_456",
-            rate_limit=60,   # 60 requests per minute
+            units_per_minute=1200,  # 60 animation POSTs or 1200 plain requests per minute
             expires_at=datetime.utcnow() + timedelta(days=365)
         )
     }
     
+    # Rate Limiting (per client IP; a request spends its route's cost from the bucket)
+    RATE_LIMIT_BACKEND: str = "redis"  # "redis" to share limits across workers, or "memory"
+    RATE_LIMIT_PER_MINUTE: int = 120  # bucket refill rate, in unit-cost requests
+    RATE_LIMIT_BURST: int = 60  # bucket size; must be at least the largest route cost (checked at startup)
+    RATE_LIMIT_ROUTE_COSTS: Dict[str, int] = {
+        "POST /api/v1/animations": 20,  # queues a GPT call and a render
+        "DELETE /api/v1/animations": 5,
+    }
+
     # File Storage
     STORAGE_PATH: str
     MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024  # 100MB
+    MAX_FILE_AGE_DAYS: int = 30
+    MEDIA_CHUNK_SIZE: int = 256 * 1024  # bytes per read when streaming media
+    MEDIA_ACCEL_REDIRECT_PREFIX: str = ""  # e.g. "/_storage" to let nginx sendfile large media
+    MEDIA_ACCEL_MIN_SIZE: int = 1024 * 1024  # only offload files at least this big
     
     # Redis Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
     CACHE_TTL: int = 3600  # 1 hour
+    CACHE_LOCK_TIMEOUT: int = 120  # lease held while one caller computes a missing value
+    CACHE_LOCK_WAIT: float = 120.0  # how long other callers wait before computing it themselves
+    LOCAL_CACHE_ENABLED: bool = True  # in-process LRU tier in front of Redis
+    LOCAL_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 64MB per process
+    LOCAL_CACHE_TTL: int = 60  # seconds; bounds staleness if an invalidation is missed
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    CACHE_SERIALIZER: str = "auto"  # "msgpack", "orjson", "json" or "auto" (fastest installed)
+    
+    # Render Job Queue
+    JOB_QUEUE_NAME: str = "animation_jobs"
+    JOB_TTL: int = 60 * 60 * 24  # 24 hours
+    WORKER_CONCURRENCY: int = 2  # jobs processed concurrently per worker process
+    JOB_DEDUPE_TTL: int = 600  # identical requests share one job while it runs, up to this long
+    JOB_HEARTBEAT_TTL: int = 60  # seconds without a heartbeat before a claimed job counts as abandoned
+    JOB_MAX_ATTEMPTS: int = 2  # runs of an abandoned job before it is failed instead of requeued
+    
+    # Manim Rendering
+    MANIM_IMAGE: str = "manim-env:latest"
+    RENDER_TIMEOUT: int = 60  # seconds
+    RENDER_WORKSPACE_PATH: str = ""  # defaults to {STORAGE_PATH}/render
+    RENDER_POOL_ENABLED: bool = False  # use warm workers instead of `docker run` per render
+    RENDER_POOL_SIZE: int = 2
+    RENDER_POOL_MAX_JOBS_PER_WORKER: int = 50  # recycle a worker after this many renders
+    RENDER_POOL_ISOLATION: str = "fork"  # "fork" a child per render, or "none"
+    RENDER_POOL_START_TIMEOUT: int = 60  # seconds
+    RENDER_POOL_WORKER_MEMORY: str = "2g"
+    
+    # Preview-first rendering: publish a fast low-quality render, then replace it
+    PREVIEW_ENABLED: bool = False
+    PREVIEW_MANIM_QUALITY: str = "low_quality"  # Manim preset for previews (480p15)
+
+    # FFmpeg
+    RENDITION_LADDER: List[str] = ["low", "medium", "high"]  # encoded side by side from one render
+    FFMPEG_TIMEOUT: int = 300  # seconds per encode
+    FFMPEG_MAX_CONCURRENCY: int = 0  # simultaneous ffmpeg processes; 0 = CPU count
+    
+    # Adaptive Streaming (HLS/DASH packaging of the rendition ladder)
+    STREAMING_ENABLED: bool = False
+    STREAMING_FORMATS: List[str] = ["hls"]  # "hls" and/or "dash"
+    STREAMING_SEGMENT_SECONDS: int = 4
+    
+    # Semantic Description Cache
+    SEMANTIC_CACHE_ENABLED: bool = False  # a wrong hit serves another description's animation; calibrate first
+    SEMANTIC_CACHE_EMBEDDER: str = "hashing"  # "hashing", "sentence-transformers", "openai" or "module:Class"
+    SEMANTIC_CACHE_MODEL: str = "all-MiniLM-L6-v2"  # used by the sentence-transformers embedder
+    SEMANTIC_CACHE_THRESHOLD: float = 0.85  # minimum cosine similarity for a hit; tuned for the hashing embedder
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 50000  # newest descriptions kept in the shared index
+    
+    # Render Cache (encoded videos keyed on normalized Manim code + quality)
+    RENDER_CACHE_ENABLED: bool = True
+    RENDER_CACHE_MAX_BYTES: int = 5 * 1024 * 1024 * 1024  # 5GB
+    
+    # SVG Cache (compiled TeX and text SVGs shared by render pool workers)
+    SVG_CACHE_ENABLED: bool = True
+    SVG_CACHE_PATH: str = ""  # defaults to {STORAGE_PATH}/svg_cache
+    SVG_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 512MB
+    
+    # Partial Movie Cache (Manim's per-animation segments, reused by later renders of a scene)
+    PARTIAL_MOVIE_CACHE_ENABLED: bool = True
+    PARTIAL_MOVIE_CACHE_PATH: str = ""  # defaults to {STORAGE_PATH}/partial_movies
+    PARTIAL_MOVIE_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024  # 2GB
+    PARTIAL_MOVIE_CACHE_RESTORE_LIMIT: int = 100  # newest segments linked into each render (Manim's max_files_cached)
     
     class Config:
         env_file = ".env"
@@ -2,7 +2,10 @@ from fastapi import Request, status, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
-from app.core.config import settings
+from app.core.config import settings, APIKey, hash_api_key
+from app.core.rate_limiter import rate_limiter
+from typing import Dict, Iterable, Optional
+import math
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,8 +32,31 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": exc.errors()}
     )
 
+class APIKeyIndex:
+    """API keys indexed by their SHA-256 digest.
+
+    Lookups hash the presented key once and do a dict lookup, so the cost
+    doesn't grow with the number of keys. Dict probing only depends on the
+    digest, which reveals nothing usable about the key, so no separate
+    constant-time comparison is needed.
+    """
+
+    def __init__(self, api_keys: Iterable[APIKey]):
+        self.keys: Dict[bytes, APIKey] = {key.key_digest: key for key in api_keys}
+        for key in self.keys.values():
+            rate_limiter.check_burst(key.units_per_minute, "An API key's units_per_minute")
+
+    def lookup(self, api_key: str) -> Optional[APIKey]:
+        return self.keys.get(hash_api_key(api_key))
+
+api_key_index = APIKeyIndex(settings.API_KEYS.values())
+
 async def verify_api_key(request: Request):
-    """Verify API key and check rate limits."""
+    """Verify API key and check its rate limit.
+
+    Quotas are spent through the shared rate limiter, so they hold across
+    every worker process and never race.
+    """
     api_key = request.headers.get("X-API-Key")
     
     if not api_key:
@@ -39,12 +65,7 @@ async def verify_api_key(request: Request):
             detail="API key is required"
         )
     
-    # Find matching API key
-    api_key_obj = None
-    for key_obj in settings.API_KEYS.values():
-        if key_obj.key == api_key:
-            api_key_obj = key_obj
-            break
+    api_key_obj = api_key_index.lookup(api_key)
     
     if not api_key_obj:
         raise HTTPException(
@@ -58,10 +79,17 @@ async def verify_api_key(request: Request):
             detail="API key has expired"
         )
     
-    if not api_key_obj.can_make_request():
+    result = await rate_limiter.acquire(
+        f"rate_limit:api_key:{api_key_obj.key_digest.hex()}",
+        units_per_minute=api_key_obj.units_per_minute,
+        burst=api_key_obj.units_per_minute,
+        cost=rate_limiter.get_cost(request.method, request.url.path)
+    )
+    if not result.allowed:
         raise HTTPException(
             status_code=429,
-            detail="Rate limit exceeded"
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(result.retry_after))}
         )
     
-    return True 
\ No newline at end of file
+    return True
\ No newline at end of file
@@ -1,34 +1,148 @@
+from typing import Dict, NamedTuple
 from fastapi import HTTPException, Request
+import math
 import time
-from collections import defaultdict
+from redis import asyncio as aioredis
+from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# GCRA: each key stores only its theoretical arrival time (TAT). A request of
+# the given cost pushes TAT forward by cost * emission interval and is allowed
+# while TAT stays within the burst tolerance of now. The key expires once the
+# bucket would be full again, so idle clients cost nothing.
+GCRA_SCRIPT = """
+local emission_interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local tat = tonumber(redis.call("GET", KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + cost * emission_interval
+local allow_at = new_tat - tolerance
+if allow_at > now then
+    return {0, tostring(allow_at - now), "0"}
+end
+
+redis.call("SET", KEYS[1], tostring(new_tat), "PX", math.ceil((new_tat - now) * 1000))
+return {1, "0", tostring((tolerance - (new_tat - now)) / emission_interval)}
+"""
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    retry_after: float  # seconds until the request would be allowed
+    remaining: int  # unit-cost requests left in the current burst
+
+class MemoryBackend:
+    """GCRA state for a single process, one float per active key."""
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.tats: Dict[str, float] = {}
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def _sweep(self, now: float):
+        # A TAT in the past means a full bucket, same as no entry at all
+        self.tats = {key: tat for key, tat in self.tats.items() if tat > now}
+        self._next_sweep = now + self.sweep_interval
+
+    async def acquire(self, key: str, emission_interval: float, tolerance: float, cost: int) -> RateLimitResult:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        tat = max(self.tats.get(key, now), now)
+        new_tat = tat + cost * emission_interval
+        allow_at = new_tat - tolerance
+        if allow_at > now:
+            return RateLimitResult(False, allow_at - now, 0)
+
+        self.tats[key] = new_tat
+        return RateLimitResult(True, 0.0, int((tolerance - (new_tat - now)) / emission_interval))
+
+class RedisBackend:
+    """GCRA state in Redis, updated atomically by a Lua script and shared by every worker."""
+
+    def __init__(self):
+        self.redis = aioredis.from_url(settings.REDIS_URL)
+
+    async def acquire(self, key: str, emission_interval: float, tolerance: float, cost: int) -> RateLimitResult:
+        allowed, retry_after, remaining = await self.redis.eval(
+            GCRA_SCRIPT, 1, key, emission_interval, tolerance, cost
+        )
+        return RateLimitResult(bool(allowed), float(retry_after), int(float(remaining)))
+
 class RateLimiter:
-    def __init__(self, requests_per_minute: int = 10):
-        self.requests_per_minute = requests_per_minute
-        self.requests = defaultdict(list)
-    
+    """Token-bucket style (GCRA) limiter with per-route request costs.
+
+    Limits are shared across processes through Redis; if Redis is unreachable
+    each process falls back to enforcing them locally.
+    """
+
+    def __init__(self, units_per_minute: int = None, burst: int = None, backend: str = None):
+        self.units_per_minute = units_per_minute or settings.RATE_LIMIT_PER_MINUTE
+        self.burst = burst or settings.RATE_LIMIT_BURST
+        self.memory = MemoryBackend()
+        self.redis = RedisBackend() if (backend or settings.RATE_LIMIT_BACKEND) == "redis" else None
+        # Longest prefixes first, so the most specific route wins
+        self.route_costs = sorted(
+            (route.split(" ", 1) + [cost] for route, cost in settings.RATE_LIMIT_ROUTE_COSTS.items()),
+            key=lambda item: len(item[1]),
+            reverse=True
+        )
+        self.max_cost = max([1, *settings.RATE_LIMIT_ROUTE_COSTS.values()])
+        self.check_burst(self.burst, "RATE_LIMIT_BURST")
+
+    def check_burst(self, burst: int, name: str):
+        """Raise if a bucket of this size could never admit the costliest route."""
+        if burst < self.max_cost:
+            raise ValueError(
+                f"{name} is {burst}, but requests can cost up to {self.max_cost} units "
+                "and would never be allowed"
+            )
+
+    def get_cost(self, method: str, path: str) -> int:
+        for route_method, prefix, cost in self.route_costs:
+            if method == route_method and path.rstrip("/").startswith(prefix):
+                return cost
+        return 1
+
+    async def acquire(
+        self,
+        key: str,
+        units_per_minute: int = None,
+        burst: int = None,
+        cost: int = 1
+    ) -> RateLimitResult:
+        """Spend cost units from key's bucket, refilled at units_per_minute up to burst."""
+        burst = burst or self.burst
+        if cost > burst:
+            raise ValueError(f"Cost {cost} exceeds the burst of {burst} and could never be allowed")
+        emission_interval = 60.0 / (units_per_minute or self.units_per_minute)
+        tolerance = emission_interval * burst
+        if self.redis is not None:
+            try:
+                return await self.redis.acquire(key, emission_interval, tolerance, cost)
+            except Exception as e:
+                logger.error(f"Rate limiter Redis error, limiting locally: {str(e)}")
+        return await self.memory.acquire(key, emission_interval, tolerance, cost)
+
     async def check_rate_limit(self, request: Request):
         client_ip = request.client.host
-        now = time.time()
-        
-        # Clean old requests
-        self.requests[client_ip] = [
-            req_time for req_time in self.requests[client_ip]
-            if now - req_time < 60
-        ]
-        
-        # Check rate limit
-        if len(self.requests[client_ip]) >= self.requests_per_minute:
+        cost = self.get_cost(request.method, request.url.path)
+        result = await self.acquire(f"rate_limit:ip:{client_ip}", cost=cost)
+
+        if not result.allowed:
             logger.warning(f"Rate limit exceeded for IP: {client_ip}")
             raise HTTPException(
                 status_code=429,
-                detail="Too many requests. Please try again later."
+                detail="Too many requests. Please try again later.",
+                headers={"Retry-After": str(math.ceil(result.retry_after))}
             )
-        
-        # Add new request
-        self.requests[client_ip].append(now)
 
-rate_limiter = RateLimiter() 
\ No newline at end of file
+rate_limiter = RateLimiter()
@@ -1,9 +1,9 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-import os
 from app.core.config import settings
 from app.api.routes import router
+from app.api.routes import media
 from app.core.rate_limiter import rate_limiter
 
 app = FastAPI(
@@ -14,7 +14,11 @@ app = FastAPI(
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
     if request.url.path.startswith("/api/"):
-        await rate_limiter.check_rate_limit(request)
+        try:
+            await rate_limiter.check_rate_limit(request)
+        except HTTPException as e:
+            # Exception handlers don't run for middleware, so respond directly
+            return JSONResponse(status_code=e.status_code, content={"detail": e.detail}, headers=e.headers)
     return await call_next(request)
 
 # Set up CORS with specific origins
@@ -29,9 +33,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount storage with file size limit
-storage_path = os.path.abspath(settings.STORAGE_PATH)
-app.mount("/storage", StaticFiles(directory=storage_path), name="storage")
+# Serve storage with Range, ETag and cache header support
+app.include_router(media.router)
 
 # API routes
 app.include_router(router, prefix=settings.API_V1_STR)
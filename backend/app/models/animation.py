@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class AnimationRequest(BaseModel):
@@ -13,15 +13,38 @@ class AnimationResponse(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     processing_time: Optional[float] = None
     quality: str
+    playlist_url: Optional[str] = None  # HLS master playlist
+    dash_url: Optional[str] = None  # DASH manifest
 
 class AnimationHistoryResponse(BaseModel):
     id: int
     description: str
-    url: str
+    url: Optional[str] = None  # None until the render finishes
     created_at: datetime
     quality: str
 
+class AnimationHistoryPage(BaseModel):
+    items: List[AnimationHistoryResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+
 class AnimationError(BaseModel):
     status: str = "error"
     detail: str
-    error_code: str 
\ No newline at end of file
+    error_code: str 
+
+class AnimationJobResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str  # server-sent progress events
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class AnimationJobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, running, preview_ready, completed, failed
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    preview_url: Optional[str] = None  # low-quality render shown while the full one finishes
+    result: Optional[AnimationResponse] = None
+    error: Optional[str] = None
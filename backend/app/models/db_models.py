@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -13,6 +13,13 @@ class Animation(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
+    # Back the keyset-paginated history listing and its filters
+    __table_args__ = (
+        Index("ix_animations_created_at_id", "created_at", "id"),
+        Index("ix_animations_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_animations_quality_created_at_id", "quality", "created_at", "id"),
+    )
+
 class User(Base):
     __tablename__ = "users"
 
@@ -0,0 +1,69 @@
+"""Compact cache records for database rows.
+
+Rows are cached as positional lists in the field order below rather than as
+dicts, so every serializer round-trips them and keys aren't repeated per row.
+"""
+from typing import List, Optional
+from datetime import datetime
+from app.models.db_models import Animation
+
+ANIMATION_FIELDS = (
+    "id",
+    "description",
+    "manim_code",
+    "animation_url",
+    "quality",
+    "created_at",
+    "user_id",
+)
+
+def animation_to_record(animation: Animation) -> list:
+    created_at = animation.created_at.isoformat() if animation.created_at else None
+    return [
+        animation.id,
+        animation.description,
+        animation.manim_code,
+        animation.animation_url,
+        animation.quality,
+        created_at,
+        animation.user_id,
+    ]
+
+def animation_from_record(record: Optional[list]) -> Optional[Animation]:
+    if not record:
+        return None
+    if isinstance(record, dict):
+        # Cached before records were introduced
+        return Animation(**record)
+    data = dict(zip(ANIMATION_FIELDS, record))
+    if data["created_at"]:
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+    return Animation(**data)
+
+def animations_to_records(animations: List[Animation]) -> List[list]:
+    return [animation_to_record(animation) for animation in animations]
+
+def animations_from_records(records: List[list]) -> List[Animation]:
+    return [animation_from_record(record) for record in records]
+
+# Listings only need these, so they never load manim_code
+ANIMATION_SUMMARY_FIELDS = (
+    "id",
+    "description",
+    "animation_url",
+    "quality",
+    "created_at",
+)
+
+def summary_to_record(row) -> list:
+    """Build a summary record from an Animation or a row of ANIMATION_SUMMARY_FIELDS."""
+    created_at = row.created_at.isoformat() if row.created_at else None
+    return [row.id, row.description, row.animation_url, row.quality, created_at]
+
+def summary_from_record(record: Optional[list]) -> Optional[Animation]:
+    if not record:
+        return None
+    data = dict(zip(ANIMATION_SUMMARY_FIELDS, record))
+    if data["created_at"]:
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+    return Animation(**data)
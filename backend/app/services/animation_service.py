@@ -1,24 +1,59 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from typing import List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import base64
+import json
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.db_models import Animation
 from app.models.animation import AnimationRequest
+from app.models.records import (
+    animation_to_record,
+    animation_from_record,
+    animations_from_records,
+    summary_to_record,
+    summary_from_record
+)
 from app.services.file_service import FileService
 from app.services.cache_service import CacheService
+from app.services.semantic_cache import semantic_cache
+from app.services.render_cache import render_cache
+from app.services.svg_cache import svg_cache
+from app.services.partial_movie_cache import partial_movie_cache
+from app.services.stats_service import stats_service
+from app.services.video_processor import video_processor
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+def encode_cursor(created_at: datetime, animation_id: int) -> str:
+    """Opaque keyset cursor pointing just past (created_at, id)."""
+    payload = json.dumps([created_at.isoformat(), animation_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, animation_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(animation_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
 class AnimationService:
     def __init__(self):
         self.file_service = FileService()
         self.cache_service = CacheService()
 
-    async def create_animation(self, db: Session, request: AnimationRequest, manim_code: str, user_id: int = None):
-        """Create animation with caching."""
+    async def create_animation(self, db: AsyncSession, request: AnimationRequest, manim_code: str, user_id: int = None):
+        """Create animation with caching.
+
+        Each quality of a description gets its own animation, so its cached
+        record's URL and quality always match what was asked for.
+        """
         try:
             # Generate cache key
-            cache_key = self.cache_service.get_animation_key(request.description)
+            cache_key = self.cache_service.get_animation_key(request.description, request.quality)
 
             # Try to get from cache or create new
             async def create_new_animation():
@@ -26,98 +61,249 @@ class AnimationService:
                 db_animation = Animation(
                     description=request.description,
                     manim_code=manim_code,
+                    quality=request.quality,
                     user_id=user_id
                 )
                 db.add(db_animation)
-                db.commit()
-                db.refresh(db_animation)
-
-                return {
-                    "id": db_animation.id,
-                    "description": db_animation.description,
-                    "manim_code": db_animation.manim_code,
-                    "animation_url": db_animation.animation_url,
-                    "user_id": db_animation.user_id
-                }
-
-            animation_data = await self.cache_service.get_or_set(
+                await db.commit()
+                await db.refresh(db_animation)
+                await stats_service.record_created(db_animation.quality)
+
+                return animation_to_record(db_animation)
+
+            animation_record = await self.cache_service.get_or_set(
                 cache_key,
                 create_new_animation,
                 expire=settings.CACHE_TTL
             )
 
-            return Animation(**animation_data)
+            return animation_from_record(animation_record)
 
         except Exception as e:
             logger.error(f"Error creating animation: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise
 
-    async def get_animation(self, db: Session, animation_id: int):
+    async def get_cached_animation(self, description: str, quality: str):
+        """Get a previously created animation for the same description, if cached.
+
+        Prefers the requested quality, but any quality will do for reusing
+        the scene code.
+        """
+        qualities = [quality] + [q for q in video_processor.quality_presets if q != quality]
+        records = await self.cache_service.mget(
+            [self.cache_service.get_animation_key(description, q) for q in qualities]
+        )
+        animation = next(
+            (animation for animation in animations_from_records(records) if animation is not None),
+            None
+        )
+        await stats_service.record_description_lookup(animation is not None)
+        return animation
+
+    async def find_similar_animation(self, db: AsyncSession, description: str, vector=None):
+        """Get an earlier animation whose description means the same thing."""
+        animation_id = await semantic_cache.lookup(description, vector)
+        if animation_id is None:
+            return None
+        return await self.get_animation(db, animation_id)
+
+    async def get_animation(self, db: AsyncSession, animation_id: int):
         """Get animation with caching."""
         cache_key = f"animation_id:{animation_id}"
         
         async def get_from_db():
-            animation = db.query(Animation).filter(Animation.id == animation_id).first()
-            if animation:
-                return {
-                    "id": animation.id,
-                    "description": animation.description,
-                    "manim_code": animation.manim_code,
-                    "animation_url": animation.animation_url,
-                    "user_id": animation.user_id
-                }
-            return None
+            animation = await db.get(Animation, animation_id)
+            return animation_to_record(animation) if animation else None
 
-        animation_data = await self.cache_service.get_or_set(
+        animation_record = await self.cache_service.get_or_set(
             cache_key,
             get_from_db,
             expire=settings.CACHE_TTL
         )
         
-        return Animation(**animation_data) if animation_data else None
+        return animation_from_record(animation_record)
+
+    async def update_animation(self, db: AsyncSession, animation_id: int, animation_url: str, quality: str):
+        """Store the rendered video URL for an animation, e.g. replacing its preview."""
+        animation = await db.get(Animation, animation_id)
+        if not animation:
+            raise ValueError(f"Animation not found: {animation_id}")
+
+        old_quality = animation.quality
+        animation.animation_url = animation_url
+        animation.quality = quality
+        await db.commit()
+        await stats_service.record_quality_change(old_quality, quality)
+
+        # Swap the cached records in one pipeline, so readers see either the
+        # old URL or the new one and never fall through to the database
+        await self.cache_service.mset(
+            {
+                f"animation_id:{animation_id}": animation_to_record(animation),
+                f"animation_summary:{animation_id}": summary_to_record(animation),
+                self.cache_service.get_animation_key(animation.description, quality): animation_to_record(animation)
+            },
+            expire=settings.CACHE_TTL
+        )
+        return animation
+
+    async def delete_animation(self, db: AsyncSession, animation_id: int):
+        """Delete an animation, its cached records and its video files."""
+        animation = await db.get(Animation, animation_id)
+        if not animation:
+            raise ValueError(f"Animation not found: {animation_id}")
+
+        await db.delete(animation)
+        await db.commit()
+        await stats_service.record_deleted(animation.quality)
+
+        await self.cache_service.delete(
+            f"animation_id:{animation_id}",
+            f"animation_summary:{animation_id}",
+            self.cache_service.get_animation_key(animation.description, animation.quality)
+        )
+        await self.file_service.delete_animation(animation_id)
 
     async def cleanup_old_files(self):
         """Clean up old animation files."""
         await self.file_service.cleanup_old_files()
 
-    async def get_recent_animations(self, db: Session, limit: int = 10):
-        """Get recent animations with caching."""
-        cache_key = f"recent_animations:{limit}"
-        
-        async def fetch_from_db():
-            return (
-                db.query(Animation)
-                .order_by(desc(Animation.created_at))
-                .limit(limit)
-                .all()
+    async def get_animations(self, db: AsyncSession, animation_ids: List[int]):
+        """Get several animations, fetching cached records in one round-trip."""
+        records = await self.cache_service.mget([f"animation_id:{i}" for i in animation_ids])
+        animations = dict(zip(animation_ids, animations_from_records(records)))
+
+        missing = [i for i, animation in animations.items() if animation is None]
+        if missing:
+            rows = (await db.execute(select(Animation).where(Animation.id.in_(missing)))).scalars().all()
+            await self.cache_service.mset(
+                {f"animation_id:{row.id}": animation_to_record(row) for row in rows},
+                expire=settings.CACHE_TTL
             )
-        
-        return await self.cache_service.get_or_set(
+            animations.update({row.id: row for row in rows})
+
+        return [animations[i] for i in animation_ids if animations[i] is not None]
+
+    async def get_animation_summaries(self, db: AsyncSession, animation_ids: List[int]):
+        """Like get_animations, but only loads the columns listings need."""
+        records = await self.cache_service.mget([f"animation_summary:{i}" for i in animation_ids])
+        animations = {i: summary_from_record(record) for i, record in zip(animation_ids, records)}
+
+        missing = [i for i, animation in animations.items() if animation is None]
+        if missing:
+            rows = (await db.execute(
+                select(
+                    Animation.id,
+                    Animation.description,
+                    Animation.animation_url,
+                    Animation.quality,
+                    Animation.created_at
+                ).where(Animation.id.in_(missing))
+            )).all()
+            records = {row.id: summary_to_record(row) for row in rows}
+            await self.cache_service.mset(
+                {f"animation_summary:{i}": record for i, record in records.items()},
+                expire=settings.CACHE_TTL
+            )
+            animations.update({i: summary_from_record(record) for i, record in records.items()})
+
+        return [animations[i] for i in animation_ids if animations[i] is not None]
+
+    async def get_animation_history(
+        self,
+        db: AsyncSession,
+        limit: int = 10,
+        cursor: str = None,
+        user_id: int = None,
+        quality: str = None
+    ) -> Tuple[list, Optional[str]]:
+        """Get a page of animations, newest first, and the cursor for the next page.
+
+        Pages are found with a keyset scan over (created_at, id), which the
+        composite indexes serve without touching the table. Only the ids are
+        cached per page; rows come from the per-animation summary cache.
+        """
+        position = decode_cursor(cursor) if cursor else None
+        cache_key = f"animation_history:{user_id}:{quality}:{limit}:{cursor}"
+
+        async def fetch_from_db():
+            query = select(Animation.id, Animation.created_at)
+            if user_id is not None:
+                query = query.where(Animation.user_id == user_id)
+            if quality is not None:
+                query = query.where(Animation.quality == quality)
+            if position is not None:
+                query = query.where(tuple_(Animation.created_at, Animation.id) < position)
+            rows = (await db.execute(
+                query
+                .order_by(Animation.created_at.desc(), Animation.id.desc())
+                .limit(limit + 1)
+            )).all()
+
+            page = rows[:limit]
+            next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+            return {"ids": [row.id for row in page], "next_cursor": next_cursor}
+
+        page = await self.cache_service.get_or_set(
             cache_key,
             fetch_from_db,
             expire=300  # Cache for 5 minutes
         )
+        return await self.get_animation_summaries(db, page["ids"]), page["next_cursor"]
 
-    async def get_animation_stats(self, db: Session):
-        """Get animation statistics."""
-        cache_key = "animation_stats"
-        
-        async def compute_stats():
-            total_count = db.query(Animation).count()
-            quality_distribution = (
-                db.query(Animation.quality, func.count(Animation.id))
+    async def get_animation_stats(self, db: AsyncSession):
+        """Get animation statistics.
+
+        Counts are maintained incrementally by StatsService; the full-table
+        count only runs to seed them, e.g. after Redis loses its data, or in
+        their place while Redis is unavailable. Cache and timing sections
+        that fail to load are reported as null.
+        """
+        counts = await stats_service.get_counts()
+        if counts is None:
+            # Start buffering deltas before counting, so rows created while
+            # the count runs are added on top instead of being lost
+            seed_token = await stats_service.begin_seed()
+            total_count = await db.scalar(select(func.count(Animation.id)))
+            quality_distribution = dict((await db.execute(
+                select(Animation.quality, func.count(Animation.id))
                 .group_by(Animation.quality)
-                .all()
-            )
-            return {
+            )).all())
+            if seed_token is not None:
+                await stats_service.finish_seed(seed_token, total_count, quality_distribution)
+            counts = {
                 "total_count": total_count,
-                "quality_distribution": dict(quality_distribution)
+                "quality_distribution": quality_distribution
             }
-        
-        return await self.cache_service.get_or_set(
-            cache_key,
-            compute_stats,
-            expire=3600  # Cache for 1 hour
+
+        sections = await asyncio.gather(
+            stats_service.get_duration_stats("render"),
+            stats_service.get_duration_stats("processing"),
+            stats_service.get_description_cache_stats(),
+            semantic_cache.get_stats(),
+            render_cache.get_stats(),
+            svg_cache.get_stats(),
+            partial_movie_cache.get_stats(),
+            return_exceptions=True
         )
-  
\ No newline at end of file
+        for section in sections:
+            if isinstance(section, Exception):
+                logger.error(f"Error loading animation stats: {str(section)}")
+        render_time, processing_time, description_cache, semantic, render, svg, partial_movies = [
+            None if isinstance(section, Exception) else section for section in sections
+        ]
+        return {
+            **counts,
+            "render_time": render_time,
+            "processing_time": processing_time,
+            "cache": {
+                "description": description_cache,
+                "semantic": semantic,
+                "render": render,
+                "svg": svg,
+                "partial_movies": partial_movies,
+                # Local and Redis tiers, as seen by this API process
+                "tiers": self.cache_service.get_metrics()
+            }
+        }
@@ -1,75 +1,285 @@
-from typing import Optional, Any
-import json
+from typing import Optional, Any, Dict, List, Union
+import asyncio
 import hashlib
+import uuid
 from redis import asyncio as aioredis
 from app.core.config import settings
+from app.services.local_cache import LocalCache
+from app.services import serializers
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Delete a lock only if it still holds our token
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
 class CacheService:
+    """Two-tier cache: a small in-process LRU in front of the shared Redis cache.
+
+    Writes and deletes publish the key on CACHE_INVALIDATION_CHANNEL so other
+    processes drop their local copy; LOCAL_CACHE_TTL bounds how stale a copy
+    can get if a message is missed.
+    """
+
+    # In-flight computations, shared by every instance in this process
+    _inflight = {}
+    # Local tier and its invalidation listener, also shared per process
+    _local = LocalCache(settings.LOCAL_CACHE_MAX_BYTES, settings.LOCAL_CACHE_TTL)
+    _listener: Optional[asyncio.Task] = None
+    _origin = uuid.uuid4().hex
+    _redis_stats = {"hits": 0, "misses": 0}
+
     def __init__(self):
         self.redis = aioredis.from_url(settings.REDIS_URL)
+        self.serializer = serializers.get_serializer(settings.CACHE_SERIALIZER)
 
     def _generate_key(self, prefix: str, data: str) -> str:
         """Generate a unique cache key."""
         hash_obj = hashlib.md5(data.encode())
         return f"{prefix}:{hash_obj.hexdigest()}"
 
-    def get_animation_key(self, description: str) -> str:
-        """Generate a unique key for animation caching."""
-        return self._generate_key("animation", description)
+    def get_animation_key(self, description: str, quality: str) -> str:
+        """Generate a unique key for caching the animation of a description at one quality."""
+        return self._generate_key(f"animation:{quality}", description)
+
+    async def get(self, key: str) -> Any:
+        """Get value from the local tier, falling back to Redis."""
+        if settings.LOCAL_CACHE_ENABLED:
+            self._ensure_listener()
+            value = self._local.get(key)
+            if value is not None:
+                return serializers.loads(value)
 
-    async def get(self, key: str) -> Optional[dict]:
-        """Get value from cache with logging."""
         try:
             value = await self.redis.get(key)
             if value:
                 logger.info(f"Cache hit for key: {key}")
-                return json.loads(value)
+                self._redis_stats["hits"] += 1
+                if settings.LOCAL_CACHE_ENABLED:
+                    self._local.set(key, value)
+                return serializers.loads(value)
             logger.info(f"Cache miss for key: {key}")
+            self._redis_stats["misses"] += 1
             return None
         except Exception as e:
             logger.error(f"Cache get error: {str(e)}")
             return None
 
-    async def set(self, key: str, value: dict, expire: int = None):
+    async def set(self, key: str, value: Any, expire: int = None):
         """Set value in cache with TTL."""
+        await self.mset({key: value}, expire)
+
+    async def delete(self, *keys: str):
+        """Delete one or more values from cache."""
+        for key in keys:
+            self._local.delete(key)
         try:
-            ttl = expire or settings.CACHE_TTL
-            await self.redis.set(
-                key,
-                json.dumps(value),
-                ex=ttl
-            )
-            logger.info(f"Cached value for key: {key}, TTL: {ttl}s")
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*keys)
+                for key in keys:
+                    self._queue_invalidation(pipe, key)
+                await pipe.execute()
+            logger.info(f"Deleted cache keys: {', '.join(keys)}")
         except Exception as e:
-            logger.error(f"Cache set error: {str(e)}")
+            logger.error(f"Cache delete error: {str(e)}")
+
+    async def mget(self, keys: List[str]) -> List[Any]:
+        """Get several values in one Redis round-trip; missing keys come back as None."""
+        values = [None] * len(keys)
+        missing = []
+        for i, key in enumerate(keys):
+            data = self._local.get(key) if settings.LOCAL_CACHE_ENABLED else None
+            if data is not None:
+                values[i] = serializers.loads(data)
+            else:
+                missing.append(i)
+        if not missing:
+            return values
 
-    async def delete(self, key: str):
-        """Delete value from cache."""
+        if settings.LOCAL_CACHE_ENABLED:
+            self._ensure_listener()
         try:
-            await self.redis.delete(key)
-            logger.info(f"Deleted cache key: {key}")
+            results = await self.redis.mget([keys[i] for i in missing])
         except Exception as e:
-            logger.error(f"Cache delete error: {str(e)}")
+            logger.error(f"Cache mget error: {str(e)}")
+            return values
+
+        hits = 0
+        for i, data in zip(missing, results):
+            if data is None:
+                continue
+            hits += 1
+            if settings.LOCAL_CACHE_ENABLED:
+                self._local.set(keys[i], data)
+            values[i] = serializers.loads(data)
+        self._redis_stats["hits"] += hits
+        self._redis_stats["misses"] += len(missing) - hits
+        logger.info(f"Cache mget: {hits}/{len(missing)} hits from Redis, {len(keys) - len(missing)} local")
+        return values
+
+    async def mset(self, values: Dict[str, Any], expire: Union[int, Dict[str, int]] = None):
+        """Set several values in one pipelined round-trip.
+
+        expire is either one TTL for every key or a dict of per-key TTLs.
+        """
+        if not values:
+            return
+        try:
+            encoded = {}
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    ttl = (expire.get(key) if isinstance(expire, dict) else expire) or settings.CACHE_TTL
+                    data = self.serializer.dumps(value)
+                    encoded[key] = (data, ttl)
+                    pipe.set(key, data, ex=ttl)
+                    self._queue_invalidation(pipe, key)
+                await pipe.execute()
+
+            if settings.LOCAL_CACHE_ENABLED:
+                for key, (data, ttl) in encoded.items():
+                    self._local.set(key, data, ttl)
+            logger.info(f"Cached values for keys: {', '.join(values)}")
+        except Exception as e:
+            logger.error(f"Cache set error: {str(e)}")
+
+    def _queue_invalidation(self, pipe, key: str):
+        if settings.LOCAL_CACHE_ENABLED:
+            pipe.publish(settings.CACHE_INVALIDATION_CHANNEL, f"{self._origin}:{key}")
+
+    def _ensure_listener(self):
+        """Start this process's invalidation listener if it isn't running."""
+        listener = CacheService._listener
+        if listener is None or listener.done():
+            CacheService._listener = asyncio.get_running_loop().create_task(self._listen_for_invalidations())
+
+    async def _listen_for_invalidations(self):
+        """Drop local copies of keys changed by other processes."""
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                # Anything cached before subscribing may have missed an invalidation
+                self._local.clear()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    origin, _, key = message["data"].decode().partition(":")
+                    if origin != self._origin:
+                        self._local.delete(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation listener error: {str(e)}")
+                self._local.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def get_metrics(self) -> dict:
+        """Hit/miss counters for each tier in this process."""
+        hits = self._redis_stats["hits"]
+        misses = self._redis_stats["misses"]
+        lookups = hits + misses
+        return {
+            "local": self._local.get_stats(),
+            "redis": {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": hits / lookups if lookups else 0.0
+            }
+        }
 
     async def get_or_set(self, key: str, getter_func, expire: int = None) -> Any:
-        """Get from cache or compute and cache value."""
+        """Get from cache or compute and cache value.
+
+        Concurrent misses for the same key are coalesced, so getter_func runs
+        once and every caller gets its result.
+        """
+        # Try to get from cache
+        cached_value = await self.get(key)
+        if cached_value is not None:
+            return cached_value
+
+        return await self.single_flight(key, getter_func, expire)
+
+    async def single_flight(self, key: str, getter_func, expire: int = None) -> Any:
+        """Compute and cache a value once across concurrent callers.
+
+        Callers in this process share one in-flight future. Across processes,
+        a Redis lease on lock:{key} picks a single leader and the others wait
+        for the value it caches under key.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            logger.info(f"Joining in-flight computation for key: {key}")
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the exception as retrieved even if nobody else joined
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
         try:
-            # Try to get from cache
+            value = await self._compute_with_lease(key, getter_func, expire)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _compute_with_lease(self, key: str, getter_func, expire: int = None) -> Any:
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.CACHE_LOCK_WAIT
+        delay = 0.05
+
+        while True:
+            try:
+                acquired = await self.redis.set(
+                    lock_key, token, nx=True, ex=settings.CACHE_LOCK_TIMEOUT
+                )
+            except Exception as e:
+                logger.error(f"Cache lock error: {str(e)}")
+                # Fall back to computing value without coalescing
+                return await getter_func()
+
+            if acquired:
+                try:
+                    # Another leader may have finished while we waited
+                    cached_value = await self.get(key)
+                    if cached_value is not None:
+                        return cached_value
+
+                    # Compute value
+                    value = await getter_func()
+
+                    # Cache the computed value
+                    await self.set(key, value, expire)
+                    return value
+                finally:
+                    await self._release_lock(lock_key, token)
+
+            # Someone else holds the lease; wait for their result
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
             cached_value = await self.get(key)
             if cached_value is not None:
                 return cached_value
 
-            # Compute value
-            value = await getter_func()
-            
-            # Cache the computed value
-            await self.set(key, value, expire)
-            
-            return value
+            if loop.time() > deadline:
+                logger.warning(f"Timed out waiting for in-flight computation of key: {key}")
+                return await getter_func()
+
+    async def _release_lock(self, lock_key: str, token: str):
+        """Release a lease only if we still hold it."""
+        try:
+            await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
         except Exception as e:
-            logger.error(f"Cache get_or_set error: {str(e)}")
-            # Fall back to computing value without caching
-            return await getter_func()
\ No newline at end of file
+            logger.error(f"Cache lock release error: {str(e)}")
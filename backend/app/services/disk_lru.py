@@ -0,0 +1,109 @@
+from abc import ABC, abstractmethod
+from typing import List
+import asyncio
+import os
+from redis import asyncio as aioredis
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class DiskLRUCache(ABC):
+    """Directory of cache files kept under max_bytes by evicting the least recently used.
+
+    Recency is the file's mtime, so users bump it on every hit. Subclasses
+    say which directories hold entries; hit, miss and eviction counters are
+    kept in a Redis hash under STATS_KEY.
+    """
+
+    NAME: str
+    STATS_KEY: str
+    SUFFIX: str
+
+    def __init__(self, cache_path: str, max_bytes: int):
+        self.redis = aioredis.from_url(settings.REDIS_URL)
+        self.cache_path = os.path.abspath(cache_path)
+        self.max_bytes = max_bytes
+        self._evict_lock = asyncio.Lock()
+
+    @abstractmethod
+    def _entry_dirs(self) -> List[str]:
+        """Directories whose SUFFIX files are cache entries."""
+
+    def _scan(self) -> list:
+        """(mtime, size, path) of every entry."""
+        entries = []
+        for directory in self._entry_dirs():
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if not entry.name.endswith(self.SUFFIX):
+                            continue
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def _evict_sync(self) -> int:
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        return evicted
+
+    def _after_evict_sync(self):
+        """Extra housekeeping run after each eviction pass."""
+
+    async def evict(self):
+        """Evict least recently used entries until the cache fits max_bytes."""
+        if self._evict_lock.locked():
+            return
+        async with self._evict_lock:
+            try:
+                evicted = await asyncio.to_thread(self._evict_sync)
+                await asyncio.to_thread(self._after_evict_sync)
+                if evicted:
+                    await self.redis.hincrby(self.STATS_KEY, "evictions", evicted)
+                    logger.info(f"Evicted {evicted} {self.NAME} entries")
+            except Exception as e:
+                logger.error(f"{self.NAME} eviction error: {str(e)}")
+
+    async def record(self, hits: int = 0, misses: int = 0):
+        """Add lookup counts; new entries may push the cache over its limit."""
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hincrby(self.STATS_KEY, "hits", hits)
+                pipe.hincrby(self.STATS_KEY, "misses", misses)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"{self.NAME} stats error: {str(e)}")
+        if misses:
+            await self.evict()
+
+    async def get_stats(self) -> dict:
+        """Get hit/miss counters and size."""
+        stats = {k.decode(): int(v) for k, v in (await self.redis.hgetall(self.STATS_KEY)).items()}
+        entries = await asyncio.to_thread(self._scan)
+        hits = stats.get("hits", 0)
+        misses = stats.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": stats.get("evictions", 0),
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": len(entries),
+            "total_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes
+        }
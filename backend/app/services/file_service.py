@@ -1,22 +1,43 @@
 import os
+import asyncio
+import uuid
+import shutil
 import aiofiles
 from datetime import datetime, timedelta
+from typing import AsyncIterable, Union
 from app.core.config import settings
 import logging
 import magic  # for file type validation
 
 logger = logging.getLogger(__name__)
 
+def link_or_copy(source_path: str, target_path: str):
+    """Hardlink source to target, copying when they are on different filesystems."""
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        shutil.copy2(source_path, target_path)
+
+def move_file(source_path: str, target_path: str):
+    """Rename source to target, falling back to a copy across filesystems."""
+    try:
+        os.replace(source_path, target_path)
+    except OSError:
+        shutil.move(source_path, target_path)
+
 class FileService:
     def __init__(self):
-        self.storage_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../storage'))
+        # Same root the /storage mount serves, so renders can be renamed into place
+        self.storage_path = os.path.abspath(settings.STORAGE_PATH)
         self.temp_path = os.path.join(self.storage_path, "temp")
         self.animations_path = os.path.join(self.storage_path, "animations")
+        self.streams_path = os.path.join(self.storage_path, "streams")
         
         # Ensure directories exist
         os.makedirs(self.storage_path, exist_ok=True)
         os.makedirs(self.temp_path, exist_ok=True)
         os.makedirs(self.animations_path, exist_ok=True)
+        os.makedirs(self.streams_path, exist_ok=True)
         
         logger.info(f"Storage directories initialized at: {self.storage_path}")
 
@@ -40,36 +61,143 @@ class FileService:
             logger.error(f"File validation failed: {str(e)}")
             return False
 
-    async def save_animation(self, animation_id: int, video_data: bytes) -> str:
-        """Save animation video and return its URL."""
-        filename = f"animation_{animation_id}.mp4"
-        filepath = os.path.join(self.animations_path, filename)
-        
-        # Save file
-        async with aiofiles.open(filepath, 'wb') as f:
-            await f.write(video_data)
-        
-        # Validate saved file
-        if not self.validate_file(filepath):
-            os.remove(filepath)
+    def get_animation_path(self, animation_id: int, quality: str = None) -> str:
+        """Get the on-disk path of an animation video or one of its renditions."""
+        if quality:
+            return os.path.join(self.animations_path, f"animation_{animation_id}_{quality}.mp4")
+        return os.path.join(self.animations_path, f"animation_{animation_id}.mp4")
+
+    def get_animation_url(self, filepath: str) -> str:
+        """Get the public URL of a file in the animations directory."""
+        return f"/storage/animations/{os.path.basename(filepath)}"
+
+    def get_temp_file_path(self, suffix: str = ".mp4") -> str:
+        """Get a unique path in the temp directory, on the same filesystem as animations."""
+        return os.path.join(self.temp_path, f"{uuid.uuid4().hex}{suffix}")
+
+    async def save_animation(
+        self,
+        animation_id: int,
+        video: Union[str, bytes, AsyncIterable[bytes]],
+        quality: str = None
+    ) -> str:
+        """Save animation video and return its URL.
+
+        video can be a path to a finished file, which is validated and moved
+        into place without being read, an async iterable of byte chunks, which
+        is streamed to disk, or raw bytes.
+        """
+        if isinstance(video, str):
+            source_path = video
+        else:
+            source_path = self.get_temp_file_path()
+            async with aiofiles.open(source_path, 'wb') as f:
+                if isinstance(video, bytes):
+                    await f.write(video)
+                else:
+                    async for chunk in video:
+                        await f.write(chunk)
+
+        # Validate the file on disk before it becomes visible
+        if not self.validate_file(source_path):
+            os.remove(source_path)
             raise ValueError("Invalid file generated")
-        
+
+        filepath = self.get_animation_path(animation_id, quality)
+        # A rename when source is on the storage filesystem; otherwise
+        # shutil.move copies with sendfile, so run it off the event loop
+        await asyncio.to_thread(move_file, source_path, filepath)
+
         logger.info(f"Animation saved to: {filepath}")
-        return f"/storage/animations/{filename}"
+        return self.get_animation_url(filepath)
+
+    async def link_animation(self, animation_id: int, source_path: str, quality: str = None) -> str:
+        """Save an already encoded video (e.g. from the render cache) and return its URL.
+
+        Raises FileNotFoundError if source_path disappears first, e.g. when
+        the cache entry is evicted concurrently.
+        """
+        filepath = self.get_animation_path(animation_id, quality)
+        tmp_path = self.get_temp_file_path()
+
+        try:
+            link_or_copy(source_path, tmp_path)
+        except FileNotFoundError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, filepath)
+        # Links and copies keep the cache entry's mtime; reset it so the age
+        # sweep doesn't delete a video that was only just published
+        os.utime(filepath)
+
+        logger.info(f"Animation linked to: {filepath}")
+        return self.get_animation_url(filepath)
+
+    def delete_rendition(self, animation_id: int, quality: str = None):
+        """Remove one rendition of an animation, if it exists."""
+        filepath = self.get_animation_path(animation_id, quality)
+        try:
+            os.remove(filepath)
+            logger.info(f"Deleted animation file: {filepath}")
+        except FileNotFoundError:
+            pass
+
+    async def delete_animation(self, animation_id: int):
+        """Remove every rendition of an animation."""
+        for quality in [None, "preview", "low", "medium", "high"]:
+            self.delete_rendition(animation_id, quality)
+
+    def get_stream_dir(self, stream_key: str) -> str:
+        """Get the directory holding the HLS/DASH packaging of a scene's ladder."""
+        return os.path.join(self.streams_path, stream_key)
+
+    def get_stream_urls(self, stream_key: str) -> dict:
+        """Get URLs of the packaged manifests that exist for a scene.
+
+        Handing the URLs out again counts as a use, so the package's mtime is
+        bumped to keep cleanup_old_files from deleting it while still in use.
+        """
+        stream_dir = self.get_stream_dir(stream_key)
+        urls = {}
+        for stream_format, manifest in (("hls", "master.m3u8"), ("dash", "manifest.mpd")):
+            if os.path.exists(os.path.join(stream_dir, manifest)):
+                urls[stream_format] = f"/storage/streams/{stream_key}/{manifest}"
+        if urls:
+            try:
+                os.utime(stream_dir)
+            except FileNotFoundError:
+                # Removed by a concurrent cleanup
+                return {}
+        return urls
+
+    def publish_stream_dir(self, stream_key: str, source_dir: str):
+        """Move a fully packaged stream directory into place.
+
+        Packaging is content addressed, so if another worker already published
+        the same scene and ladder its copy is kept and ours is discarded.
+        """
+        try:
+            os.rename(source_dir, self.get_stream_dir(stream_key))
+        except OSError:
+            shutil.rmtree(source_dir, ignore_errors=True)
 
     async def cleanup_old_files(self, max_age_days: int = None):
         """Remove files older than max_age_days."""
         max_age = max_age_days or settings.MAX_FILE_AGE_DAYS
         now = datetime.now()
         
-        for directory in [self.temp_path, self.animations_path]:
+        for directory in [self.temp_path, self.animations_path, self.streams_path]:
             if os.path.exists(directory):
                 for filename in os.listdir(directory):
                     filepath = os.path.join(directory, filename)
                     file_modified = datetime.fromtimestamp(os.path.getmtime(filepath))
                     if now - file_modified > timedelta(days=max_age):
                         try:
-                            os.remove(filepath)
+                            if os.path.isdir(filepath):
+                                shutil.rmtree(filepath)
+                            else:
+                                os.remove(filepath)
                             logger.info(f"Cleaned up old file: {filepath}")
                         except Exception as e:
                             logger.error(f"Failed to remove file {filepath}: {str(e)}")
\ No newline at end of file
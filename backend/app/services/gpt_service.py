@@ -1,14 +1,48 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, RateLimitError, InternalServerError
 from app.core.config import settings
+from app.services.render_progress import ProgressCallback
+import asyncio
+import httpx
 import logging
+import random
 import re
 import ast
 
 logger = logging.getLogger(__name__)
 
+# Errors worth retrying after a backoff; anything else is raised straight away
+TRANSIENT_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError, asyncio.TimeoutError)
+
 class GPTService:
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        # One pooled HTTP client per process so LLM calls reuse connections
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS
+            ),
+            timeout=httpx.Timeout(settings.OPENAI_REQUEST_TIMEOUT, connect=10.0)
+        )
+        self.client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
+            http_client=self.http_client,
+            max_retries=0  # retries are handled in generate_manim_code
+        )
+        self._semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENT_REQUESTS)
+
+    async def _create_completion(self, **kwargs):
+        """Make one chat completion call, capped in concurrency and time."""
+        async with self._semaphore:
+            return await asyncio.wait_for(
+                self.client.chat.completions.create(**kwargs),
+                timeout=settings.OPENAI_REQUEST_TIMEOUT
+            )
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        cap = min(settings.OPENAI_RETRY_MAX_DELAY, settings.OPENAI_RETRY_BASE_DELAY * 2 ** attempt)
+        return random.uniform(0, cap)
 
     def clean_code(self, code: str) -> str:
         """Clean and validate the generated Python code."""
@@ -62,13 +96,20 @@ class GPTService:
         if not re.search(r'self\.wait\(\)', code):
             logger.warning("No wait() call found in animation")
 
-    async def generate_manim_code(self, description: str, max_retries: int = 3) -> str:
+    async def generate_manim_code(
+        self,
+        description: str,
+        max_retries: int = 3,
+        progress_callback: ProgressCallback = None
+    ) -> str:
         """Generate Manim code with retry logic."""
         last_error = None
         
         for attempt in range(max_retries):
             try:
-                response = self.client.chat.completions.create(
+                if progress_callback:
+                    await progress_callback("generating_code", attempt=attempt + 1)
+                response = await self._create_completion(
                     model="gpt-4o-mini",
                     messages=[
                         {
@@ -146,6 +187,8 @@ Return ONLY the Python code without any additional text or formatting."""
                 )
                 
                 code = response.choices[0].message.content
+                if progress_callback:
+                    await progress_callback("validating_code", attempt=attempt + 1)
                 cleaned_code = self.clean_code(code)
                 
                 logger.info(f"Generated code (attempt {attempt + 1}):\n{cleaned_code}")
@@ -155,6 +198,12 @@ Return ONLY the Python code without any additional text or formatting."""
                 last_error = e
                 logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
                 continue
+            except TRANSIENT_ERRORS as e:
+                last_error = e
+                logger.warning(f"Attempt {attempt + 1} failed: {type(e).__name__}: {str(e)}")
+                if attempt + 1 < max_retries:
+                    await asyncio.sleep(self._backoff_delay(attempt))
+                continue
             except Exception as e:
                 logger.error(f"GPT service error: {str(e)}")
                 raise
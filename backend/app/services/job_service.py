@@ -0,0 +1,293 @@
+from typing import AsyncIterator, Optional, Tuple
+from datetime import datetime
+import asyncio
+import hashlib
+import json
+import uuid
+from redis import asyncio as aioredis
+from app.core.config import settings
+from app.models.animation import AnimationRequest
+from app.services.cache_service import CacheService, RELEASE_LOCK_SCRIPT
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Append an event to a job's history and broadcast it, tagged with its
+# sequence number so subscribers can skip events they already replayed
+PUBLISH_EVENT_SCRIPT = """
+local seq = redis.call("rpush", KEYS[1], ARGV[1])
+redis.call("expire", KEYS[1], ARGV[2])
+redis.call("publish", KEYS[1], seq .. ":" .. ARGV[1])
+return seq
+"""
+
+# Move a dedupe lease to a new job only if it still names the finished job
+# we looked at, so concurrent requests can't both take it over
+TAKE_OVER_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    redis.call("set", KEYS[1], ARGV[2], "EX", ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# Put an abandoned job back at the head of the queue, unless another reaper
+# already took it off the processing list
+REQUEUE_SCRIPT = """
+if redis.call("lrem", KEYS[1], 1, ARGV[1]) == 1 then
+    redis.call("rpush", KEYS[2], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# Phases after which a job emits no more events
+TERMINAL_PHASES = ("completed", "failed")
+
+class JobService:
+    """Redis-backed queue of render jobs shared by the API and the workers.
+
+    Dequeued jobs move to a processing list rather than leaving Redis, and
+    their worker keeps a heartbeat key alive while it runs them. A job whose
+    heartbeat lapses, e.g. because its worker was killed, is requeued by
+    reap_abandoned_jobs, or failed once it has used up JOB_MAX_ATTEMPTS.
+    """
+
+    def __init__(self):
+        self.redis = aioredis.from_url(settings.REDIS_URL)
+        self.cache_service = CacheService()
+        self.queue_name = settings.JOB_QUEUE_NAME
+        self.processing_name = f"{settings.JOB_QUEUE_NAME}:processing"
+        # Processing entries that had no heartbeat on the last reaper pass
+        self._suspects = set()
+
+    def _job_key(self, job_id: str) -> str:
+        return f"job:{job_id}"
+
+    def _heartbeat_key(self, job_id: str) -> str:
+        return f"job_heartbeat:{job_id}"
+
+    def _events_key(self, job_id: str) -> str:
+        return f"job_events:{job_id}"
+
+    def _dedupe_key(self, request: AnimationRequest) -> str:
+        """Key identifying requests that would produce the same animation."""
+        animation_key = self.cache_service.get_animation_key(request.description, request.quality)
+        options = json.dumps([request.quality, request.customization], sort_keys=True)
+        return f"job_inflight:{animation_key}:{hashlib.md5(options.encode()).hexdigest()}"
+
+    async def enqueue(self, request: AnimationRequest) -> dict:
+        """Store a new job record and push it onto the render queue.
+
+        If an identical request is already queued or running, its job is
+        returned instead, so duplicates share one pipeline run.
+        """
+        job_id = uuid.uuid4().hex
+        dedupe_key = self._dedupe_key(request)
+        job = {
+            "job_id": job_id,
+            "dedupe_key": dedupe_key,
+            "status": "queued",
+            "request": request.model_dump(),
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "attempts": 0,
+            "preview_url": None,
+            "result": None,
+            "error": None
+        }
+
+        # Store the record before claiming the lease, so a lease always names
+        # a job that can be looked up
+        await self.redis.set(self._job_key(job_id), json.dumps(job), ex=settings.JOB_TTL)
+
+        while not await self.redis.set(dedupe_key, job_id, nx=True, ex=settings.JOB_DEDUPE_TTL):
+            existing_id = await self.redis.get(dedupe_key)
+            if existing_id is None:
+                # Released or expired in the meantime; try to claim it again
+                continue
+            existing_job = await self.get_job(existing_id.decode())
+            if existing_job and existing_job["status"] in ("queued", "running", "preview_ready"):
+                await self.redis.delete(self._job_key(job_id))
+                logger.info(f"Coalesced request into in-flight job: {existing_job['job_id']}")
+                return existing_job
+            # The previous job is gone or finished; take over its lease unless
+            # another request got there first, then look again
+            if await self.redis.eval(
+                TAKE_OVER_LEASE_SCRIPT, 1, dedupe_key, existing_id, job_id, settings.JOB_DEDUPE_TTL
+            ):
+                break
+
+        # Publish before pushing, so a fast worker's "running" can't land first
+        await self.publish_event(job_id, "queued")
+        await self.redis.lpush(self.queue_name, job_id)
+
+        logger.info(f"Enqueued render job: {job_id}")
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        """Get the current state of a job."""
+        value = await self.redis.get(self._job_key(job_id))
+        if value is None:
+            return None
+        return json.loads(value)
+
+    async def update_job(self, job_id: str, **fields) -> Optional[dict]:
+        """Merge fields into a job record, keeping its TTL."""
+        job = await self.get_job(job_id)
+        if job is None:
+            logger.warning(f"Tried to update unknown job: {job_id}")
+            return None
+
+        job.update(fields)
+        await self.redis.set(self._job_key(job_id), json.dumps(job), ex=settings.JOB_TTL)
+        return job
+
+    async def publish_event(self, job_id: str, phase: str, **details):
+        """Record a timestamped progress event for a job and notify subscribers."""
+        event = {"phase": phase, "timestamp": datetime.utcnow().isoformat(), **details}
+        try:
+            await self.redis.eval(
+                PUBLISH_EVENT_SCRIPT, 1, self._events_key(job_id), json.dumps(event), settings.JOB_TTL
+            )
+        except Exception as e:
+            # Progress is best effort; never fail a job over it
+            logger.error(f"Failed to publish job event: {str(e)}")
+
+    async def stream_events(
+        self,
+        job_id: str,
+        after: int = 0,
+        heartbeat: float = 15.0
+    ) -> AsyncIterator[Tuple[Optional[int], Optional[dict]]]:
+        """Yield (sequence, event) for a job, replaying history after `after`, until it finishes.
+
+        Yields (None, None) after `heartbeat` seconds without events.
+        """
+        key = self._events_key(job_id)
+        pubsub = self.redis.pubsub()
+        # Subscribe before replaying so nothing published in between is lost
+        await pubsub.subscribe(key)
+        try:
+            last_seq = after
+            for seq, data in enumerate(await self.redis.lrange(key, after, -1), start=after + 1):
+                event = json.loads(data)
+                last_seq = seq
+                yield seq, event
+                if event["phase"] in TERMINAL_PHASES:
+                    return
+
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+                if message is None:
+                    # Let the caller send a keep-alive and check on the job
+                    yield None, None
+                    continue
+                seq, _, data = message["data"].decode().partition(":")
+                if int(seq) <= last_seq:
+                    continue
+                event = json.loads(data)
+                last_seq = int(seq)
+                yield last_seq, event
+                if event["phase"] in TERMINAL_PHASES:
+                    return
+        finally:
+            await pubsub.aclose()
+
+    async def release_job(self, job: dict):
+        """Stop coalescing new requests into a finished job."""
+        dedupe_key = job.get("dedupe_key")
+        if not dedupe_key:
+            return
+        try:
+            await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, dedupe_key, job["job_id"])
+        except Exception as e:
+            # The lease expires on its own after JOB_DEDUPE_TTL
+            logger.error(f"Failed to release job lease: {str(e)}")
+
+    async def dequeue(self, timeout: int = 5) -> Optional[dict]:
+        """Block until a job is available or the timeout expires.
+
+        The job stays on the processing list until ack_job; keep_alive must
+        run while it is processed.
+        """
+        job_id = await self.redis.blmove(self.queue_name, self.processing_name, timeout, "RIGHT", "LEFT")
+        if job_id is None:
+            return None
+
+        job_id = job_id.decode()
+        await self.redis.set(self._heartbeat_key(job_id), 1, ex=settings.JOB_HEARTBEAT_TTL)
+        job = await self.get_job(job_id)
+        if job is None:
+            logger.warning(f"Dropping expired job: {job_id}")
+            await self.ack_job(job_id)
+        return job
+
+    async def keep_alive(self, job_id: str):
+        """Refresh a job's heartbeat until cancelled."""
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_TTL / 3)
+            try:
+                await self.redis.set(self._heartbeat_key(job_id), 1, ex=settings.JOB_HEARTBEAT_TTL)
+            except Exception as e:
+                logger.error(f"Failed to refresh job heartbeat: {str(e)}")
+
+    async def ack_job(self, job_id: str):
+        """Take a finished job off the processing list."""
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.lrem(self.processing_name, 1, job_id)
+                pipe.delete(self._heartbeat_key(job_id))
+                await pipe.execute()
+        except Exception as e:
+            # The reaper finds it again, but the job record already says how it ended
+            logger.error(f"Failed to acknowledge job: {str(e)}")
+
+    async def reap_abandoned_jobs(self):
+        """Requeue or fail processed jobs whose worker stopped sending heartbeats.
+
+        A job is moved onto the processing list just before its first
+        heartbeat is written, so it is only reaped once it has been seen
+        without one on two passes in a row.
+        """
+        job_ids = [job_id.decode() for job_id in await self.redis.lrange(self.processing_name, 0, -1)]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for job_id in job_ids:
+                pipe.exists(self._heartbeat_key(job_id))
+            alive = await pipe.execute()
+
+        missing = {job_id for job_id, beating in zip(job_ids, alive) if not beating}
+        abandoned = missing & self._suspects
+        self._suspects = missing - abandoned
+
+        for job_id in abandoned:
+            # Reapers in other worker processes may have seen it too
+            if not await self.redis.set(f"job_reap:{job_id}", 1, nx=True, ex=settings.JOB_HEARTBEAT_TTL):
+                continue
+            job = await self.get_job(job_id)
+            if job is not None and job.get("attempts", 0) < settings.JOB_MAX_ATTEMPTS:
+                await self.update_job(job_id, status="queued", started_at=None)
+                await self.publish_event(job_id, "queued", requeued=True)
+                if await self.redis.eval(REQUEUE_SCRIPT, 2, self.processing_name, self.queue_name, job_id):
+                    logger.warning(f"Requeued abandoned job: {job_id}")
+                continue
+
+            if not await self.redis.lrem(self.processing_name, 1, job_id):
+                # Another reaper got to it first
+                continue
+            if job is None:
+                continue
+            error = "The worker stopped while processing this job"
+            await self.update_job(
+                job_id,
+                status="failed",
+                finished_at=datetime.utcnow().isoformat(),
+                error=error
+            )
+            await self.publish_event(job_id, "failed", error=error)
+            await self.release_job(job)
+            logger.warning(f"Failed abandoned job after {job.get('attempts', 0)} attempts: {job_id}")
+
+# Create singleton instance
+job_service = JobService()
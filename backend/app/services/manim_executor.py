@@ -1,94 +1,161 @@
 import tempfile
+import glob
 import os
 import asyncio
 import logging
-import shutil
+import uuid
+from collections import deque
 from app.core.config import settings
+from app.services.file_service import move_file
+from app.services.partial_movie_cache import partial_movie_cache
+from app.services.render_pool import render_pool
+from app.services.render_progress import ManimProgressTracker, ProgressCallback, iter_output_lines
+from app.services.video_processor import RenderSettings
 
 logger = logging.getLogger(__name__)
 
+# Manim's own quality presets
+MANIM_QUALITIES = {
+    "low_quality": RenderSettings(854, 480, 15),
+    "medium_quality": RenderSettings(1280, 720, 30),
+    "high_quality": RenderSettings(1920, 1080, 60),
+}
+
 class ManimExecutor:
-    async def execute_manim_code(self, manim_code: str) -> str:
-        """Execute Manim code and return path to generated video."""
+    def __init__(self, use_pool: bool = None):
+        self.use_pool = settings.RENDER_POOL_ENABLED if use_pool is None else use_pool
+
+    async def execute_manim_code(
+        self,
+        manim_code: str,
+        progress_callback: ProgressCallback = None,
+        render_settings: RenderSettings = None
+    ) -> str:
+        """Execute Manim code and return path to generated video.
+
+        The scene is rendered natively at render_settings (Manim's medium
+        quality by default). Manim's progress bars are parsed into "rendering"
+        progress events for progress_callback as the scene renders.
+        """
+        render_settings = render_settings or MANIM_QUALITIES["medium_quality"]
         try:
-            # Create temporary directory for Manim files
-            with tempfile.TemporaryDirectory() as temp_dir:
+            # Create temporary directory for Manim files inside the shared
+            # render workspace so warm pool workers can see it
+            os.makedirs(render_pool.workspace_path, exist_ok=True)
+            with tempfile.TemporaryDirectory(dir=render_pool.workspace_path) as temp_dir:
                 # Write Manim code to file
                 script_path = os.path.join(temp_dir, "scene.py")
                 with open(script_path, "w") as f:
                     f.write(manim_code)
-                
+
                 logger.info(f"Generated Manim code:\n{manim_code}")
                 logger.info(f"Script path: {script_path}")
-                
+
                 # Get the Scene class name from the code
                 scene_class = self._extract_scene_class_name(manim_code)
-                
-                # Execute Manim in Docker container
-                cmd = [
-                    "docker", "run", "--rm",
-                    "-v", f"{os.path.abspath(temp_dir)}:/workspace",
-                    "manim-env:latest",
-                    "manim", "render", "scene.py", scene_class,
-                    "-qm"
-                ]
-                
-                logger.info(f"Running command: {' '.join(cmd)}")
-                
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    cwd=temp_dir
-                )
-                
-                # Add timeout to process
-                try:
-                    stdout, stderr = await asyncio.wait_for(
-                        process.communicate(),
-                        timeout=60  # 60 seconds timeout
+
+                # Seed Manim's partial movie directory with segments earlier
+                # renders of this scene lineage produced
+                lineage = partial_movie_cache.get_lineage(manim_code, scene_class)
+                restored = await partial_movie_cache.restore(temp_dir, scene_class, lineage, render_settings)
+
+                if self.use_pool:
+                    source_video = await render_pool.render(
+                        temp_dir, scene_class, render_settings, progress_callback
                     )
-                except asyncio.TimeoutError:
-                    process.kill()
-                    raise Exception("Animation generation timed out after 60 seconds")
-                
-                logger.info(f"Manim stdout:\n{stdout.decode()}")
-                logger.info(f"Manim stderr:\n{stderr.decode()}")
-                
-                if process.returncode != 0:
-                    raise Exception(f"Manim execution failed: {stderr.decode()}")
-                
-                # Find generated video file
-                media_dir = os.path.join(temp_dir, "media", "videos", "scene", "720p30")
-                logger.info(f"Looking for video in: {media_dir}")
-                
-                if not os.path.exists(media_dir):
-                    raise Exception(f"Media directory not found: {media_dir}")
-                
-                files = os.listdir(media_dir)
-                logger.info(f"Files in media directory: {files}")
-                
-                # Look for any .mp4 file
-                video_files = [f for f in files if f.endswith('.mp4')]
-                if not video_files:
-                    raise Exception("No video files found in output directory")
-                
-                source_video = os.path.join(media_dir, video_files[0])
-                
-                # Copy to storage directory
+                else:
+                    source_video = await self._render_in_container(
+                        temp_dir, scene_class, render_settings, progress_callback
+                    )
+
+                await partial_movie_cache.collect(temp_dir, scene_class, lineage, render_settings, restored)
+
+                # Hand the video off to storage by renaming it out of the
+                # render workspace before the temp dir is cleaned up
                 storage_dir = os.path.join(settings.STORAGE_PATH, "temp")
                 os.makedirs(storage_dir, exist_ok=True)
-                target_video = os.path.join(storage_dir, f"{scene_class}.mp4")
-                
-                shutil.copy2(source_video, target_video)
-                logger.info(f"Copied video to: {target_video}")
-                
+                target_video = os.path.join(storage_dir, f"{uuid.uuid4().hex}_{scene_class}.mp4")
+
+                move_file(source_video, target_video)
+                logger.info(f"Moved video to: {target_video}")
+
                 return target_video
 
         except Exception as e:
             logger.error(f"Manim execution failed: {str(e)}")
             raise
 
+    async def _render_in_container(
+        self,
+        temp_dir: str,
+        scene_class: str,
+        render_settings: RenderSettings,
+        progress_callback: ProgressCallback = None
+    ) -> str:
+        """Render the scene in a fresh container and return the video path."""
+        # Execute Manim in Docker container
+        cmd = [
+            "docker", "run", "--rm",
+            "-v", f"{os.path.abspath(temp_dir)}:/workspace",
+            settings.MANIM_IMAGE,
+            "manim", "render", "scene.py", scene_class,
+            "--resolution", f"{render_settings.width},{render_settings.height}",
+            "--fps", str(render_settings.fps)
+        ]
+
+        logger.info(f"Running command: {' '.join(cmd)}")
+
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=temp_dir
+        )
+
+        # Read stderr as it arrives to follow Manim's progress bars; keep
+        # the tail for error messages
+        tracker = ManimProgressTracker(progress_callback)
+        stderr_lines = deque(maxlen=200)
+
+        async def read_stderr():
+            async for line in iter_output_lines(process.stderr):
+                stderr_lines.append(line)
+                await tracker.feed(line)
+
+        # Add timeout to process
+        try:
+            stdout, _, _ = await asyncio.wait_for(
+                asyncio.gather(process.stdout.read(), read_stderr(), process.wait()),
+                timeout=settings.RENDER_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            process.kill()
+            raise Exception(f"Animation generation timed out after {settings.RENDER_TIMEOUT} seconds")
+        except asyncio.CancelledError:
+            process.kill()
+            raise
+
+        stderr = "\n".join(stderr_lines)
+        logger.info(f"Manim stdout:\n{stdout.decode()}")
+        logger.info(f"Manim stderr:\n{stderr}")
+
+        if process.returncode != 0:
+            raise Exception(f"Manim execution failed: {stderr}")
+
+        # Find generated video file. Manim names the directory after the
+        # output height and frame rate (e.g. 720p30), so search for it
+        media_dir = os.path.join(temp_dir, "media", "videos")
+        logger.info(f"Looking for video in: {media_dir}")
+
+        video_files = [
+            path for path in glob.glob(os.path.join(media_dir, "**", f"{scene_class}.mp4"), recursive=True)
+            if "partial_movie_files" not in path
+        ]
+        if not video_files:
+            raise Exception("No video files found in output directory")
+
+        return video_files[0]
+
     def _extract_scene_class_name(self, code: str) -> str:
         """Extract the Scene class name from the code."""
         try:
@@ -100,4 +167,4 @@ class ManimExecutor:
             return "Scene"  # Default if not found
         except Exception as e:
             logger.error(f"Failed to extract scene class name: {str(e)}")
-            return "Scene"
\ No newline at end of file
+            return "Scene"
@@ -1,6 +1,11 @@
-from app.services.manim_executor import ManimExecutor
+import os
+import shutil
+from app.core.config import settings
+from app.services.manim_executor import MANIM_QUALITIES, ManimExecutor
 from app.services.file_service import FileService
 from app.services.video_processor import video_processor
+from app.services.render_cache import render_cache
+from app.services.render_progress import ProgressCallback
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,34 +15,188 @@ class ManimService:
         self.executor = ManimExecutor()
         self.file_service = FileService()
 
-    async def create_animation(self, manim_code: str, animation_id: int, quality: str = None) -> str:
-        """Create animation from Manim code and return the URL."""
+    async def create_animation(
+        self,
+        manim_code: str,
+        animation_id: int,
+        quality: str = None,
+        progress_callback: ProgressCallback = None
+    ) -> str:
+        """Create animation from Manim code and return the URL.
+
+        progress_callback, if given, is awaited with each phase (rendering,
+        encoding, saving, ...) and with Manim's per-animation progress.
+        """
+        async def report(phase: str, **details):
+            if progress_callback:
+                await progress_callback(phase, **details)
+
         try:
-            # Execute Manim code
-            video_file = await self.executor.execute_manim_code(manim_code)
+            quality = quality or video_processor.default_quality
+
+            # Another quality of this animation may already have produced it
+            existing_path = self.file_service.get_animation_path(animation_id, quality)
+            if os.path.exists(existing_path):
+                logger.info(f"Serving existing rendition: {existing_path}")
+                return self.file_service.get_animation_url(existing_path)
+
+            # Reuse an identical scene that was already rendered at this quality
+            render_key = render_cache.get_render_key(manim_code, quality)
+            cached_video = await render_cache.lookup(render_key)
+            if cached_video:
+                try:
+                    animation_url = await self.file_service.link_animation(
+                        animation_id=animation_id,
+                        source_path=cached_video,
+                        quality=quality
+                    )
+                    await report("render_cache_hit")
+                    return animation_url
+                except FileNotFoundError:
+                    # Evicted since the lookup; render it again
+                    logger.info(f"Render cache entry vanished, rendering: {render_key}")
+
+            # Execute Manim code at the requested quality's native size and frame rate
+            await report("rendering")
+            video_file = await self.executor.execute_manim_code(
+                manim_code,
+                progress_callback,
+                render_settings=video_processor.get_render_settings(quality)
+            )
             
-            # Optimize video
-            optimized_video = await video_processor.optimize_video(video_file, quality)
+            # Encode every rendition of the ladder in one ffmpeg pass, straight
+            # from Manim's output into storage. The requested quality is only
+            # remuxed when Manim's output already fits its preset; streaming
+            # needs keyframes on segment boundaries, so it is always encoded
+            await report("encoding")
+            renditions = {
+                rendition: self.file_service.get_temp_file_path()
+                for rendition in video_processor.get_rendition_ladder(quality)
+            }
+            copy = []
+            if not settings.STREAMING_ENABLED and await video_processor.fits_preset(video_file, quality):
+                copy.append(quality)
+            try:
+                await video_processor.encode_renditions(video_file, renditions, copy=copy)
+            except Exception:
+                for path in renditions.values():
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise
+            finally:
+                os.remove(video_file)
             
             # Get video info for logging
-            video_info = await video_processor.get_video_info(optimized_video)
+            video_info = await video_processor.get_video_info(renditions[quality])
             logger.info(f"Video info: {video_info}")
             
-            # Read optimized video file
-            with open(optimized_video, "rb") as f:
-                video_data = f.read()
+            # Move renditions to permanent storage side by side and make each
+            # one available to the render cache
+            await report("saving")
+            animation_urls = {}
+            for rendition, path in renditions.items():
+                animation_urls[rendition] = await self.file_service.save_animation(
+                    animation_id=animation_id,
+                    video=path,
+                    quality=rendition
+                )
+                await render_cache.store(
+                    render_cache.get_render_key(manim_code, rendition),
+                    self.file_service.get_animation_path(animation_id, rendition)
+                )
             
-            # Save to permanent storage
-            animation_url = await self.file_service.save_animation(
-                animation_id=animation_id,
-                video_data=video_data
-            )
-            
-            return animation_url
+            if settings.STREAMING_ENABLED:
+                await report("packaging")
+                await self._package_streams(manim_code, animation_id, quality, list(renditions))
+
+            return animation_urls[quality]
 
         except Exception as e:
             logger.error(f"Animation creation failed: {str(e)}")
             raise
 
+    async def has_rendition(self, manim_code: str, animation_id: int, quality: str) -> bool:
+        """Whether create_animation can finish without rendering."""
+        if os.path.exists(self.file_service.get_animation_path(animation_id, quality)):
+            return True
+        return await render_cache.contains(render_cache.get_render_key(manim_code, quality))
+
+    async def create_preview(
+        self,
+        manim_code: str,
+        animation_id: int,
+        progress_callback: ProgressCallback = None
+    ) -> str:
+        """Render a quick low-quality preview and return its URL.
+
+        Manim's own output is published as is, skipping ffmpeg, so the
+        preview is ready as soon as the render finishes.
+        """
+        render_key = render_cache.get_render_key(manim_code, "preview")
+        cached_video = await render_cache.lookup(render_key)
+        if cached_video:
+            try:
+                return await self.file_service.link_animation(animation_id, cached_video, quality="preview")
+            except FileNotFoundError:
+                logger.info(f"Render cache entry vanished, rendering: {render_key}")
+
+        if progress_callback:
+            await progress_callback("rendering_preview")
+        video_file = await self.executor.execute_manim_code(
+            manim_code,
+            progress_callback,
+            render_settings=MANIM_QUALITIES[settings.PREVIEW_MANIM_QUALITY]
+        )
+        preview_url = await self.file_service.save_animation(animation_id, video_file, quality="preview")
+        await render_cache.store(render_key, self.file_service.get_animation_path(animation_id, "preview"))
+        return preview_url
+
+    def discard_preview(self, animation_id: int):
+        """Remove an animation's preview once the full render replaced it.
+
+        The render cache keeps its own link, so the preview can still be
+        reused by later requests for the same scene.
+        """
+        self.file_service.delete_rendition(animation_id, "preview")
+
+    async def _package_streams(self, manim_code: str, animation_id: int, quality: str, qualities: list):
+        """Package the stored renditions, a ladder topping out at quality, for adaptive streaming.
+
+        Packages are keyed on the top quality too, so a scene first requested
+        at a low quality is packaged again with the full ladder when a higher
+        quality is requested later.
+        """
+        stream_key = render_cache.get_stream_key(manim_code, quality)
+        if self.file_service.get_stream_urls(stream_key):
+            return
+
+        # Highest resolution first, so players start on the best variant
+        qualities = sorted(
+            qualities,
+            key=lambda q: int(video_processor.quality_presets[q]["resolution"].rstrip("p")),
+            reverse=True
+        )
+        renditions = {
+            q: self.file_service.get_animation_path(animation_id, q)
+            for q in qualities
+        }
+        package_dir = self.file_service.get_temp_file_path(suffix="")
+        os.makedirs(package_dir)
+        try:
+            await video_processor.package_streams(
+                renditions,
+                package_dir,
+                settings.STREAMING_FORMATS
+            )
+            self.file_service.publish_stream_dir(stream_key, package_dir)
+        except Exception as e:
+            # Progressive mp4 playback still works without the streams
+            shutil.rmtree(package_dir, ignore_errors=True)
+            logger.error(f"Stream packaging failed: {str(e)}")
+
+    def get_stream_urls(self, manim_code: str, quality: str) -> dict:
+        """Get HLS/DASH manifest URLs for a scene's ladder up to quality, if it has been packaged."""
+        return self.file_service.get_stream_urls(render_cache.get_stream_key(manim_code, quality))
+
 # Create singleton instance
 manim_service = ManimService()
\ No newline at end of file
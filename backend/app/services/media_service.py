@@ -0,0 +1,192 @@
+from typing import Optional, Tuple
+import hashlib
+import os
+import re
+import stat
+import aiofiles
+from fastapi import HTTPException, Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only published videos and stream packages are public; the rest of storage
+# holds render workspaces (scene code), temp files and internal caches
+PUBLIC_DIRS = ("animations", "streams")
+
+# Stream packages are named after a SHA-256 of the scene and ladder they
+# package, so a given URL never changes what it points to
+CONTENT_ADDRESSED = re.compile(r"(^|/)[0-9a-f]{64}(/|\.|$)")
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+MEDIA_TYPES = {
+    ".mp4": "video/mp4",
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".mpd": "application/dash+xml",
+    ".m4s": "video/iso.segment",
+}
+
+class MediaFileResponse(Response):
+    """Send a byte range of a file.
+
+    Uses the ASGI zero-copy extension (sendfile) when the server offers it,
+    and otherwise streams fixed-size chunks so memory stays flat.
+    """
+
+    def __init__(self, path: str, start: int, length: int, status_code: int, headers: dict):
+        super().__init__(status_code=status_code, headers=headers)
+        self.path = path
+        self.start = start
+        self.length = length
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopy" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": f.fileno(),
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            return
+
+        remaining = self.length
+        async with aiofiles.open(self.path, "rb") as f:
+            await f.seek(self.start)
+            while remaining > 0:
+                chunk = await f.read(min(settings.MEDIA_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+        if remaining > 0:
+            # File shrank underneath us; close the response cleanly
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+class MediaService:
+    """Serve files from storage with Range requests, strong ETags and long-lived caching."""
+
+    def __init__(self):
+        self.root = os.path.abspath(settings.STORAGE_PATH)
+
+    def _resolve(self, path: str) -> Tuple[str, os.stat_result]:
+        full_path = os.path.realpath(os.path.join(self.root, path))
+        if not any(
+            os.path.commonpath([full_path, public_dir]) == public_dir
+            for public_dir in (os.path.join(self.root, name) for name in PUBLIC_DIRS)
+        ):
+            raise HTTPException(status_code=404, detail="Not found")
+        try:
+            st = os.stat(full_path)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Not found")
+        if not stat.S_ISREG(st.st_mode):
+            raise HTTPException(status_code=404, detail="Not found")
+        return full_path, st
+
+    def is_content_addressed(self, path: str) -> bool:
+        return bool(CONTENT_ADDRESSED.search(path))
+
+    def get_etag(self, path: str, st: os.stat_result) -> str:
+        """Strong ETag for a file.
+
+        Content-addressed paths are tagged by their name. Everything else is
+        tagged by inode, size and mtime: renditions are published by renaming
+        a new file into place, so a re-render always changes the tag, and
+        serving never has to read the file.
+        """
+        if self.is_content_addressed(path):
+            return f'"{hashlib.sha256(path.encode()).hexdigest()[:32]}"'
+        return f'"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+    def _parse_range(self, header: str, size: int) -> Optional[Tuple[int, int]]:
+        """Parse a single byte range into (start, end) inclusive.
+
+        Returns None when the header should be ignored (e.g. multiple ranges)
+        and raises 416 when it can't be satisfied.
+        """
+        match = RANGE_HEADER.match(header.strip())
+        if not match:
+            return None
+        first, last = match.groups()
+        if not first and not last:
+            return None
+
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+            return max(size - length, 0), size - 1
+
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or start > end:
+            raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        return start, end
+
+    async def serve(self, path: str, request: Request) -> Response:
+        full_path, st = self._resolve(path)
+        etag = self.get_etag(path, st)
+
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Content-Type": MEDIA_TYPES.get(os.path.splitext(full_path)[1], "application/octet-stream"),
+            "Cache-Control": (
+                "public, max-age=31536000, immutable"
+                if self.is_content_addressed(path)
+                else "public, max-age=0, must-revalidate"
+            ),
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        byte_range = None
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if range_header and (not if_range or if_range.strip() == etag):
+            byte_range = self._parse_range(range_header, st.st_size)
+
+        if byte_range:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+        else:
+            start, end = 0, st.st_size - 1
+            status_code = 200
+        length = end - start + 1
+        headers["Content-Length"] = str(length)
+
+        # Let a fronting nginx send large files itself with sendfile
+        if settings.MEDIA_ACCEL_REDIRECT_PREFIX and st.st_size >= settings.MEDIA_ACCEL_MIN_SIZE:
+            return Response(headers={
+                "X-Accel-Redirect": f"{settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{path}",
+                "ETag": etag,
+                "Cache-Control": headers["Cache-Control"],
+            })
+
+        return MediaFileResponse(full_path, start, length, status_code, headers)
+
+# Create singleton instance
+media_service = MediaService()
@@ -0,0 +1,195 @@
+from typing import List, Set
+import ast
+import asyncio
+import hashlib
+import os
+import re
+from app.core.config import settings
+from app.services.disk_lru import DiskLRUCache
+from app.services.file_service import link_or_copy
+from app.services.video_processor import RenderSettings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PartialMovieCache(DiskLRUCache):
+    """Persistent cache of Manim's partial movie files, one directory per scene lineage.
+
+    Manim names each play/wait segment after a hash of the animation, camera
+    and mobjects, and skips segments whose file already exists. A lineage is
+    a scene (see get_lineage) rendered at one size and frame rate; before a
+    render its most recently used segments are hardlinked into the job's
+    partial movie directory, and afterwards the segments the finished movie
+    used are linked back. Edits and retries of a scene then only render the
+    segments that changed. Entries are evicted least recently used (by mtime)
+    once the cache exceeds PARTIAL_MOVIE_CACHE_MAX_BYTES.
+    """
+
+    NAME = "partial movie cache"
+    STATS_KEY = "partial_movie_cache:stats"
+    SUFFIX = ".mp4"
+    # Statements at the start of construct() that identify a lineage
+    LINEAGE_STATEMENTS = 3
+
+    def __init__(self):
+        super().__init__(
+            settings.PARTIAL_MOVIE_CACHE_PATH or os.path.join(settings.STORAGE_PATH, "partial_movies"),
+            settings.PARTIAL_MOVIE_CACHE_MAX_BYTES
+        )
+        self.restore_limit = settings.PARTIAL_MOVIE_CACHE_RESTORE_LIMIT
+
+    def get_lineage(self, manim_code: str, scene_class: str) -> str:
+        """Name the lineage a scene's segments are cached under.
+
+        Generated scenes often share a class name, so the name is combined
+        with a hash of the first few statements of construct(). Retries and
+        edits further into a scene stay in one lineage, while unrelated
+        scenes don't crowd each other out of the restore limit.
+        """
+        try:
+            construct = next(
+                node
+                for cls in ast.parse(manim_code).body
+                if isinstance(cls, ast.ClassDef) and cls.name == scene_class
+                for node in cls.body
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "construct"
+            )
+            prefix = "\n".join(ast.dump(node) for node in construct.body[:self.LINEAGE_STATEMENTS])
+        except (SyntaxError, StopIteration):
+            prefix = manim_code
+        return f"{scene_class}_{hashlib.sha256(prefix.encode()).hexdigest()[:16]}"
+
+    def _lineage_path(self, lineage: str, render_settings: RenderSettings) -> str:
+        return os.path.join(self.cache_path, f"{lineage}_{render_settings.height}p{render_settings.fps}")
+
+    def _entry_dirs(self) -> List[str]:
+        try:
+            with os.scandir(self.cache_path) as it:
+                return [entry.path for entry in it if entry.is_dir()]
+        except FileNotFoundError:
+            return []
+
+    def get_job_partial_dir(self, job_dir: str, scene_class: str, render_settings: RenderSettings) -> str:
+        """Where Manim looks for partial movie files when rendering job_dir/scene.py."""
+        return os.path.join(
+            job_dir, "media", "videos", "scene",
+            f"{render_settings.height}p{render_settings.fps}",
+            "partial_movie_files", scene_class
+        )
+
+    def _restore_sync(self, lineage_path: str, partial_dir: str) -> Set[str]:
+        try:
+            with os.scandir(lineage_path) as it:
+                entries = [
+                    (entry.stat().st_mtime, entry.name)
+                    for entry in it if entry.name.endswith(".mp4")
+                ]
+        except FileNotFoundError:
+            return set()
+
+        # Manim deletes all but the newest max_files_cached segments after a
+        # render, so linking more than that gains nothing
+        newest = sorted(entries, reverse=True)[:self.restore_limit]
+        os.makedirs(partial_dir, exist_ok=True)
+        restored = set()
+        for _, name in newest:
+            try:
+                link_or_copy(os.path.join(lineage_path, name), os.path.join(partial_dir, name))
+                restored.add(name)
+            except FileNotFoundError:
+                # Evicted while we were linking
+                continue
+        return restored
+
+    async def restore(
+        self,
+        job_dir: str,
+        scene_class: str,
+        lineage: str,
+        render_settings: RenderSettings
+    ) -> Set[str]:
+        """Link the lineage's cached segments into a job; returns the restored file names."""
+        if not settings.PARTIAL_MOVIE_CACHE_ENABLED:
+            return set()
+        try:
+            return await asyncio.to_thread(
+                self._restore_sync,
+                self._lineage_path(lineage, render_settings),
+                self.get_job_partial_dir(job_dir, scene_class, render_settings)
+            )
+        except Exception as e:
+            logger.error(f"Partial movie cache restore error: {str(e)}")
+            return set()
+
+    def _used_segments(self, partial_dir: str) -> list:
+        """Segments the finished movie was combined from, per Manim's concat list.
+
+        Uncached segments (random or uncacheable scenes) are named by play
+        index rather than content and are never reused.
+        """
+        list_path = os.path.join(partial_dir, "partial_movie_file_list.txt")
+        if not os.path.exists(list_path):
+            return []
+        with open(list_path, encoding="utf-8") as f:
+            names = [os.path.basename(path) for path in re.findall(r"^file 'file:(.*)'$", f.read(), re.M)]
+        return [name for name in names if not name.startswith("uncached_")]
+
+    def _collect_sync(self, partial_dir: str, lineage_path: str, restored: Set[str]) -> tuple:
+        used = self._used_segments(partial_dir)
+        os.makedirs(lineage_path, exist_ok=True)
+        hits = 0
+        misses = 0
+        for name in set(used):
+            cache_entry = os.path.join(lineage_path, name)
+            if name in restored:
+                hits += 1
+                try:
+                    os.utime(cache_entry)
+                    continue
+                except FileNotFoundError:
+                    # Evicted during the render; add it back below
+                    pass
+            else:
+                misses += 1
+
+            tmp_path = f"{cache_entry}.{os.getpid()}.tmp"
+            try:
+                link_or_copy(os.path.join(partial_dir, name), tmp_path)
+                os.replace(tmp_path, cache_entry)
+                os.utime(cache_entry)
+            except OSError as e:
+                logger.error(f"Partial movie cache store error: {str(e)}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        return hits, misses
+
+    async def collect(
+        self,
+        job_dir: str,
+        scene_class: str,
+        lineage: str,
+        render_settings: RenderSettings,
+        restored: Set[str]
+    ):
+        """Cache the segments a successful render used and record hit counts.
+
+        Only call this after Manim finished; a failed render can leave a
+        truncated segment behind under its final name.
+        """
+        if not settings.PARTIAL_MOVIE_CACHE_ENABLED:
+            return
+        try:
+            hits, misses = await asyncio.to_thread(
+                self._collect_sync,
+                self.get_job_partial_dir(job_dir, scene_class, render_settings),
+                self._lineage_path(lineage, render_settings),
+                restored
+            )
+        except Exception as e:
+            logger.error(f"Partial movie cache collect error: {str(e)}")
+            return
+        logger.info(f"Partial movie cache: {hits} segments reused, {misses} rendered")
+        await self.record(hits, misses)
+
+# Create singleton instance
+partial_movie_cache = PartialMovieCache()
@@ -0,0 +1,187 @@
+from typing import Optional
+import ast
+import hashlib
+import os
+import time
+from redis import asyncio as aioredis
+from app.core.config import settings
+from app.services.file_service import link_or_copy
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _NormalizeScene(ast.NodeTransformer):
+    """Strip details that don't change the rendered video."""
+
+    def visit_ClassDef(self, node):
+        self.generic_visit(node)
+        # Scene class names only affect the output filename
+        node.name = "_Scene"
+        return self._strip_docstring(node)
+
+    def visit_FunctionDef(self, node):
+        self.generic_visit(node)
+        return self._strip_docstring(node)
+
+    def _strip_docstring(self, node):
+        if (
+            node.body
+            and isinstance(node.body[0], ast.Expr)
+            and isinstance(node.body[0].value, ast.Constant)
+            and isinstance(node.body[0].value.value, str)
+            and len(node.body) > 1
+        ):
+            node.body = node.body[1:]
+        return node
+
+class RenderCache:
+    """Content-addressed cache of encoded videos keyed on Manim code and quality.
+
+    Entries are hardlinked into {STORAGE_PATH}/renders/{key}.mp4 and tracked in
+    Redis, so every worker shares one cache and evicts least recently used
+    videos once the total size exceeds RENDER_CACHE_MAX_BYTES.
+    """
+
+    LRU_KEY = "render_cache:lru"
+    SIZES_KEY = "render_cache:sizes"
+    TOTAL_BYTES_KEY = "render_cache:total_bytes"
+    STATS_KEY = "render_cache:stats"
+
+    def __init__(self):
+        self.redis = aioredis.from_url(settings.REDIS_URL)
+        self.cache_path = os.path.join(settings.STORAGE_PATH, "renders")
+        self.max_bytes = settings.RENDER_CACHE_MAX_BYTES
+        os.makedirs(self.cache_path, exist_ok=True)
+
+    def normalize_code(self, manim_code: str) -> str:
+        """Return a canonical form of the code that ignores formatting and comments."""
+        try:
+            tree = _NormalizeScene().visit(ast.parse(manim_code))
+            return ast.dump(tree, annotate_fields=False)
+        except SyntaxError:
+            return manim_code.strip()
+
+    def get_scene_key(self, manim_code: str) -> str:
+        """Generate a quality-independent content address for a scene."""
+        return hashlib.sha256(self.normalize_code(manim_code).encode()).hexdigest()
+
+    def get_stream_key(self, manim_code: str, quality: str) -> str:
+        """Generate the content address for a scene's streams, whose ladder tops out at quality."""
+        data = f"{self.normalize_code(manim_code)}\0streams\0{quality}"
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def get_render_key(self, manim_code: str, quality: str) -> str:
+        """Generate the content address for a rendered scene."""
+        data = f"{self.normalize_code(manim_code)}\0{quality}"
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_path, f"{key}.mp4")
+
+    async def contains(self, key: str) -> bool:
+        """Whether key is cached, without counting a hit or miss or touching its recency."""
+        if not settings.RENDER_CACHE_ENABLED:
+            return False
+
+        try:
+            in_index = await self.redis.zscore(self.LRU_KEY, key) is not None
+            return in_index and os.path.exists(self._entry_path(key))
+        except Exception as e:
+            logger.error(f"Render cache lookup error: {str(e)}")
+            return False
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """Return the cached video path for key, or None on a miss."""
+        if not settings.RENDER_CACHE_ENABLED:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            in_index = await self.redis.zscore(self.LRU_KEY, key) is not None
+            if in_index and os.path.exists(path):
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.zadd(self.LRU_KEY, {key: time.time()})
+                    pipe.hincrby(self.STATS_KEY, "hits", 1)
+                    await pipe.execute()
+                logger.info(f"Render cache hit for key: {key}")
+                return path
+
+            if in_index:
+                # File was removed behind our back; drop the stale entry
+                await self._remove_entry(key)
+            await self.redis.hincrby(self.STATS_KEY, "misses", 1)
+            logger.info(f"Render cache miss for key: {key}")
+            return None
+        except Exception as e:
+            logger.error(f"Render cache lookup error: {str(e)}")
+            return None
+
+    async def store(self, key: str, video_path: str):
+        """Add an encoded video to the cache and evict old entries if needed."""
+        if not settings.RENDER_CACHE_ENABLED:
+            return
+
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            link_or_copy(video_path, tmp_path)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.zadd(self.LRU_KEY, {key: time.time()})
+                pipe.hsetnx(self.SIZES_KEY, key, size)
+                _, is_new = await pipe.execute()
+            # hsetnx avoids double counting when two workers store the same key
+            if is_new:
+                await self.redis.incrby(self.TOTAL_BYTES_KEY, size)
+
+            logger.info(f"Stored render cache entry: {key} ({size} bytes)")
+            await self._evict()
+        except Exception as e:
+            logger.error(f"Render cache store error: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def _remove_entry(self, key: str):
+        size = await self.redis.hget(self.SIZES_KEY, key)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.LRU_KEY, key)
+            pipe.hdel(self.SIZES_KEY, key)
+            if size is not None:
+                pipe.decrby(self.TOTAL_BYTES_KEY, int(size))
+            await pipe.execute()
+
+        path = self._entry_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    async def _evict(self):
+        """Evict least recently used entries until the cache fits max_bytes."""
+        while int(await self.redis.get(self.TOTAL_BYTES_KEY) or 0) > self.max_bytes:
+            oldest = await self.redis.zpopmin(self.LRU_KEY)
+            if not oldest:
+                break
+            key = oldest[0][0].decode()
+            # zpopmin already removed it from the index; _remove_entry cleans up the rest
+            await self._remove_entry(key)
+            await self.redis.hincrby(self.STATS_KEY, "evictions", 1)
+            logger.info(f"Evicted render cache entry: {key}")
+
+    async def get_stats(self) -> dict:
+        """Get render cache hit/miss counters and size."""
+        stats = {k.decode(): int(v) for k, v in (await self.redis.hgetall(self.STATS_KEY)).items()}
+        hits = stats.get("hits", 0)
+        misses = stats.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": stats.get("evictions", 0),
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": await self.redis.zcard(self.LRU_KEY),
+            "total_bytes": int(await self.redis.get(self.TOTAL_BYTES_KEY) or 0),
+            "max_bytes": self.max_bytes
+        }
+
+# Create singleton instance
+render_cache = RenderCache()
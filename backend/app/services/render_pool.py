@@ -0,0 +1,202 @@
+from typing import Optional
+import asyncio
+import json
+import os
+import uuid
+from app.core.config import settings
+from app.services.render_progress import ManimProgressTracker, ProgressCallback, iter_output_lines
+from app.services.svg_cache import svg_cache
+from app.services.video_processor import RenderSettings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RenderWorker:
+    """A long-lived manim-env container running docker/render_worker.py."""
+
+    def __init__(self, workspace_path: str):
+        self.workspace_path = workspace_path
+        self.name = f"manim-worker-{uuid.uuid4().hex[:12]}"
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.jobs_done = 0
+        self.healthy = False
+        self._stderr_task: Optional[asyncio.Task] = None
+        # Follows Manim's progress bars for the job currently rendering
+        self.progress = ManimProgressTracker(None)
+
+    async def start(self):
+        cmd = [
+            "docker", "run", "--rm", "-i",
+            "--name", self.name,
+            "--network", "none",
+            "--memory", settings.RENDER_POOL_WORKER_MEMORY,
+            "-v", f"{self.workspace_path}:/workspace"
+        ]
+        if settings.SVG_CACHE_ENABLED:
+            cmd.extend(["-v", f"{svg_cache.ensure_path()}:/svg-cache"])
+        cmd.extend([
+            settings.MANIM_IMAGE,
+            "python", "/opt/render_worker.py",
+            "--isolation", settings.RENDER_POOL_ISOLATION
+        ])
+        if settings.SVG_CACHE_ENABLED:
+            cmd.extend(["--svg-cache", "/svg-cache"])
+        logger.info(f"Starting render worker: {' '.join(cmd)}")
+
+        self.process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+
+        message = await self._read_message(timeout=settings.RENDER_POOL_START_TIMEOUT)
+        if not message.get("ready"):
+            raise Exception(f"Render worker {self.name} failed to start: {message}")
+
+        self.healthy = True
+        logger.info(f"Render worker {self.name} ready (manim {message.get('manim_version')})")
+
+    async def _drain_stderr(self):
+        """Forward Manim's log output so the pipe never fills up."""
+        async for line in iter_output_lines(self.process.stderr):
+            logger.debug(f"[{self.name}] {line.rstrip()}")
+            await self.progress.feed(line)
+
+    async def _read_message(self, timeout: float) -> dict:
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout=timeout)
+        if not line:
+            raise Exception(f"Render worker {self.name} exited unexpectedly")
+        return json.loads(line)
+
+    async def render(
+        self,
+        job_dir: str,
+        scene_class: str,
+        render_settings: RenderSettings,
+        timeout: float,
+        progress_callback: ProgressCallback = None
+    ) -> str:
+        """Render the scene in job_dir and return the host path of the video."""
+        job = {
+            "id": uuid.uuid4().hex,
+            "workdir": f"/workspace/{os.path.basename(job_dir)}",
+            "scene_file": "scene.py",
+            "scene_class": scene_class,
+            "pixel_width": render_settings.width,
+            "pixel_height": render_settings.height,
+            "frame_rate": render_settings.fps
+        }
+
+        self.progress = ManimProgressTracker(progress_callback)
+        try:
+            self.process.stdin.write((json.dumps(job) + "\n").encode())
+            await self.process.stdin.drain()
+            result = await self._read_message(timeout=timeout)
+        except asyncio.TimeoutError:
+            self.healthy = False
+            raise Exception(f"Animation generation timed out after {timeout} seconds")
+        except (Exception, asyncio.CancelledError):
+            # Including cancellation: the worker is still busy with this job,
+            # so it is recycled rather than handed the next one
+            self.healthy = False
+            raise
+        finally:
+            self.jobs_done += 1
+            self.progress = ManimProgressTracker(None)
+
+        if result.get("id") != job["id"]:
+            self.healthy = False
+            raise Exception(f"Render worker {self.name} returned a response for another job")
+
+        if "svg_cache" in result:
+            await svg_cache.record(**result["svg_cache"])
+
+        if not result.get("ok"):
+            raise Exception(f"Manim execution failed: {result.get('error')}")
+
+        return os.path.join(job_dir, result["output"])
+
+    async def stop(self):
+        self.healthy = False
+        if self.process and self.process.returncode is None:
+            kill = await asyncio.create_subprocess_exec(
+                "docker", "kill", self.name,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            await kill.wait()
+            await self.process.wait()
+        if self._stderr_task:
+            self._stderr_task.cancel()
+
+
+class RenderPool:
+    """Pool of warm Manim workers that render scenes without a cold container start."""
+
+    def __init__(self):
+        self.size = settings.RENDER_POOL_SIZE
+        self.max_jobs_per_worker = settings.RENDER_POOL_MAX_JOBS_PER_WORKER
+        self.workspace_path = os.path.abspath(
+            settings.RENDER_WORKSPACE_PATH or os.path.join(settings.STORAGE_PATH, "render")
+        )
+        self._idle: Optional[asyncio.Queue] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_started(self):
+        async with self._lock:
+            if self._idle is not None:
+                return
+            os.makedirs(self.workspace_path, exist_ok=True)
+            self._idle = asyncio.Queue()
+            # Workers are started on first use so a failing image doesn't stop the pool
+            for _ in range(self.size):
+                self._idle.put_nowait(None)
+
+    async def _spawn(self) -> RenderWorker:
+        worker = RenderWorker(self.workspace_path)
+        try:
+            await worker.start()
+        except Exception:
+            await worker.stop()
+            raise
+        return worker
+
+    async def render(
+        self,
+        job_dir: str,
+        scene_class: str,
+        render_settings: RenderSettings,
+        progress_callback: ProgressCallback = None
+    ) -> str:
+        """Render a scene on the next free worker.
+
+        job_dir must be a direct child of the pool's workspace path.
+        """
+        await self._ensure_started()
+        worker = await self._idle.get()
+        try:
+            if worker is None or not worker.healthy:
+                worker = await self._spawn()
+            return await worker.render(
+                job_dir, scene_class, render_settings, timeout=settings.RENDER_TIMEOUT, progress_callback=progress_callback
+            )
+        finally:
+            if worker is not None and (not worker.healthy or worker.jobs_done >= self.max_jobs_per_worker):
+                logger.info(f"Recycling render worker {worker.name} after {worker.jobs_done} jobs")
+                await worker.stop()
+                worker = None
+            self._idle.put_nowait(worker)
+
+    async def close(self):
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            worker = self._idle.get_nowait()
+            if worker is not None:
+                await worker.stop()
+        self._idle = None
+
+# Create singleton instance
+render_pool = RenderPool()
@@ -0,0 +1,67 @@
+from typing import AsyncIterator, Awaitable, Callable, Optional
+import asyncio
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Called as progress_callback(phase, **details) at each pipeline step
+ProgressCallback = Callable[..., Awaitable[None]]
+
+# Manim's tqdm bars, e.g.
+#   Animation 2: Create(Circle):  45%|####5     | 27/60 [00:00<00:00, 99.1it/s]
+#   Waiting 3:  80%|########  | 24/30 [00:00<00:00, 120.3it/s]
+MANIM_PROGRESS = re.compile(
+    r"(?P<description>(?:Animation|Waiting) (?P<index>\d+).*?):\s+(?P<percent>\d+)%\|"
+    r".*?\|\s*(?P<frame>\d+)/(?P<frames>\d+)"
+)
+
+async def iter_output_lines(stream: asyncio.StreamReader) -> AsyncIterator[str]:
+    """Yield lines from a subprocess pipe, treating tqdm's carriage returns as line breaks."""
+    buffer = ""
+    while True:
+        chunk = await stream.read(4096)
+        if not chunk:
+            break
+        buffer += chunk.decode(errors="replace")
+        *lines, buffer = re.split(r"[\r\n]", buffer)
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+class ManimProgressTracker:
+    """Turn Manim's progress bar output into throttled "rendering" progress events."""
+
+    def __init__(self, progress_callback: Optional[ProgressCallback], step: int = 10):
+        self.progress_callback = progress_callback
+        self.step = step
+        self._last = None
+
+    async def feed(self, line: str):
+        if self.progress_callback is None:
+            return
+        match = MANIM_PROGRESS.search(line)
+        if not match:
+            return
+
+        index = int(match.group("index"))
+        percent = int(match.group("percent"))
+        # One event per play/wait at the start, then every `step` percent
+        position = (index, percent // self.step)
+        if position == self._last:
+            return
+        self._last = position
+
+        try:
+            await self.progress_callback(
+                "rendering",
+                animation=index,
+                description=match.group("description").strip(),
+                percent=percent,
+                frame=int(match.group("frame")),
+                frames=int(match.group("frames"))
+            )
+        except Exception as e:
+            logger.error(f"Progress callback failed: {str(e)}")
@@ -0,0 +1,300 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+import asyncio
+import hashlib
+import importlib
+import re
+import time
+import numpy as np
+from redis import asyncio as aioredis
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Embedder(ABC):
+    """Turns descriptions into L2-normalized vectors."""
+
+    dimensions: int
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed each text as one row of a float32 matrix."""
+
+class HashingEmbedder(Embedder):
+    """Dependency-free embedder using hashed content words and ordered word pairs.
+
+    Descriptions are reduced to their content words, with common verbs for
+    turning one shape into another folded together, so "Animate a square
+    turning into a circle" and "square transforms into circle" embed the
+    same. Ordered word pairs keep "circle into square" apart from "square
+    into circle". Rewordings outside its small vocabulary are not caught;
+    use a real model for those.
+    """
+
+    STOPWORDS = {
+        "a", "an", "and", "animate", "animation", "as", "at", "by", "create",
+        "draw", "for", "from", "how", "in", "into", "is", "it", "its", "me",
+        "of", "on", "please", "show", "that", "the", "then", "to", "with"
+    }
+    SYNONYMS = {
+        "become": "transform", "chang": "transform", "change": "transform",
+        "convert": "transform", "morph": "transform", "turn": "transform"
+    }
+    PAIR_WINDOW = 4
+
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+
+    def _normalize(self, word: str) -> str:
+        for suffix in ("ing", "ed", "s"):
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+        return self.SYNONYMS.get(word, word)
+
+    def _features(self, text: str) -> List[str]:
+        words = [
+            self._normalize(word)
+            for word in re.findall(r"[a-z0-9]+", text.lower())
+            if word not in self.STOPWORDS
+        ]
+        features = list(words)
+        for i, word in enumerate(words):
+            features.extend(f"{word}>{other}" for other in words[i + 1:i + 1 + self.PAIR_WINDOW])
+        return features
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in self._features(text):
+            digest = hashlib.md5(feature.encode()).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        return np.stack([self._embed_one(text) for text in texts])
+
+class SentenceTransformerEmbedder(Embedder):
+    """Local transformer model, e.g. all-MiniLM-L6-v2 (needs sentence-transformers)."""
+
+    def __init__(self, model_name: str = None):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name or settings.SEMANTIC_CACHE_MODEL)
+        self.dimensions = self.model.get_sentence_embedding_dimension()
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = await asyncio.to_thread(
+            self.model.encode, texts, normalize_embeddings=True
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI embeddings API, sharing GPTService's connection pool."""
+
+    def __init__(self, model_name: str = None):
+        from app.services.gpt_service import gpt_service
+        self.client = gpt_service.client
+        self.model_name = model_name or "text-embedding-3-small"
+        self.dimensions = 1536
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        response = await self.client.embeddings.create(model=self.model_name, input=texts)
+        vectors = np.array([item.embedding for item in response.data], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def create_embedder(name: str) -> Embedder:
+    """Build the embedder named in settings; "module:Class" loads a custom one."""
+    if name == "hashing":
+        return HashingEmbedder()
+    if name == "sentence-transformers":
+        return SentenceTransformerEmbedder()
+    if name == "openai":
+        return OpenAIEmbedder()
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+class VectorIndex:
+    """In-memory flat inner-product index over normalized vectors.
+
+    Exact search is a single matrix-vector product, which stays well under a
+    millisecond for the tens of thousands of descriptions we expect.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self.ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, vectors: np.ndarray, ids: List[int]):
+        self.vectors = np.vstack([self.vectors, vectors.astype(np.float32)])
+        self.ids.extend(ids)
+
+    def trim(self, max_entries: int):
+        """Drop the oldest vectors beyond max_entries."""
+        if len(self.ids) > max_entries:
+            self.vectors = self.vectors[-max_entries:]
+            self.ids = self.ids[-max_entries:]
+
+    def search(self, vector: np.ndarray) -> Optional[Tuple[int, float]]:
+        """Return (id, similarity) of the nearest neighbour."""
+        if not self.ids:
+            return None
+        scores = self.vectors @ vector
+        best = int(np.argmax(scores))
+        return self.ids[best], float(scores[best])
+
+# Append an entry and keep only the newest ARGV[2]; SEQ_KEY counts every
+# append ever made, so readers can tell how far the list has moved on
+ADD_ENTRY_SCRIPT = """
+if redis.call("exists", KEYS[2]) == 0 then
+    redis.call("set", KEYS[2], redis.call("llen", KEYS[1]))
+end
+redis.call("rpush", KEYS[1], ARGV[1])
+redis.call("ltrim", KEYS[1], -tonumber(ARGV[2]), -1)
+return redis.call("incr", KEYS[2])
+"""
+
+# Return {seq, reset, entries added after ARGV[1]}; reset is 1 when the
+# entries the caller has not seen were already trimmed away (or Redis was
+# flushed), in which case entries holds the whole list
+SYNC_ENTRIES_SCRIPT = """
+local length = redis.call("llen", KEYS[1])
+local seq = tonumber(redis.call("get", KEYS[2]) or length)
+local count = seq - tonumber(ARGV[1])
+local reset = 0
+if count < 0 or count > length then
+    reset = 1
+    count = length
+end
+local entries = {}
+if count > 0 then
+    entries = redis.call("lrange", KEYS[1], -count, -1)
+end
+return {seq, reset, entries}
+"""
+
+class SemanticCache:
+    """Maps descriptions to earlier animations with a similar meaning.
+
+    Vectors are appended to a Redis list shared by all processes and capped
+    at SEMANTIC_CACHE_MAX_ENTRIES; each process keeps an in-memory index and
+    pulls new entries before a lookup.
+    """
+
+    ENTRIES_KEY = "semantic_cache:entries"
+    SEQ_KEY = "semantic_cache:seq"
+    STATS_KEY = "semantic_cache:stats"
+
+    def __init__(self):
+        self.redis = aioredis.from_url(settings.REDIS_URL)
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD
+        self.max_entries = settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self._embedder: Optional[Embedder] = None
+        self._index: Optional[VectorIndex] = None
+        self._seq = 0
+        self._sync_lock = asyncio.Lock()
+
+    @property
+    def embedder(self) -> Embedder:
+        if self._embedder is None:
+            self._embedder = create_embedder(settings.SEMANTIC_CACHE_EMBEDDER)
+        return self._embedder
+
+    async def _sync(self):
+        """Load entries added by any process since the last sync."""
+        async with self._sync_lock:
+            if self._index is None:
+                self._index = VectorIndex(self.embedder.dimensions)
+            seq, reset, entries = await self.redis.eval(
+                SYNC_ENTRIES_SCRIPT, 2, self.ENTRIES_KEY, self.SEQ_KEY, self._seq
+            )
+            self._seq = int(seq)
+            if reset:
+                self._index = VectorIndex(self.embedder.dimensions)
+            if not entries:
+                return
+            ids = []
+            vectors = []
+            for entry in entries:
+                animation_id, vector = entry.split(b":", 1)
+                ids.append(int(animation_id))
+                vectors.append(np.frombuffer(vector, dtype=np.float32))
+            self._index.add(np.stack(vectors), ids)
+            self._index.trim(self.max_entries)
+
+    async def embed(self, description: str) -> Optional[np.ndarray]:
+        """Embed a description once, for passing to both lookup and add."""
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return None
+        try:
+            return (await self.embedder.embed([description]))[0].astype(np.float32)
+        except Exception as e:
+            logger.error(f"Semantic cache embed error: {str(e)}")
+            return None
+
+    async def lookup(self, description: str, vector: Optional[np.ndarray] = None) -> Optional[int]:
+        """Return the id of a similar earlier animation, or None."""
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return None
+
+        start = time.perf_counter()
+        try:
+            await self._sync()
+            if vector is None:
+                vector = (await self.embedder.embed([description]))[0]
+            match = self._index.search(vector)
+        except Exception as e:
+            logger.error(f"Semantic cache lookup error: {str(e)}")
+            return None
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        hit = match is not None and match[1] >= self.threshold
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hincrby(self.STATS_KEY, "hits" if hit else "misses", 1)
+                pipe.hincrbyfloat(self.STATS_KEY, "lookup_ms_total", elapsed_ms)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Semantic cache stats error: {str(e)}")
+
+        if hit:
+            logger.info(f"Semantic cache hit: animation {match[0]} (similarity {match[1]:.3f}, {elapsed_ms:.1f}ms)")
+            return match[0]
+        logger.info(f"Semantic cache miss ({elapsed_ms:.1f}ms)")
+        return None
+
+    async def add(self, description: str, animation_id: int, vector: Optional[np.ndarray] = None):
+        """Index a description so similar future requests can reuse its animation."""
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return
+        try:
+            if vector is None:
+                vector = (await self.embedder.embed([description]))[0]
+            entry = f"{animation_id}:".encode() + vector.astype(np.float32).tobytes()
+            await self.redis.eval(
+                ADD_ENTRY_SCRIPT, 2, self.ENTRIES_KEY, self.SEQ_KEY, entry, self.max_entries
+            )
+        except Exception as e:
+            logger.error(f"Semantic cache add error: {str(e)}")
+
+    async def get_stats(self) -> dict:
+        """Get semantic cache hit rate and average lookup latency."""
+        stats = {k.decode(): float(v) for k, v in (await self.redis.hgetall(self.STATS_KEY)).items()}
+        hits = int(stats.get("hits", 0))
+        misses = int(stats.get("misses", 0))
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "avg_lookup_ms": stats.get("lookup_ms_total", 0.0) / lookups if lookups else 0.0,
+            "entries": await self.redis.llen(self.ENTRIES_KEY)
+        }
+
+# Create singleton instance
+semantic_cache = SemanticCache()
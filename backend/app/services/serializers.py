@@ -0,0 +1,82 @@
+from abc import ABC, abstractmethod
+from typing import Any
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional speedup
+    msgpack = None
+
+# 0xc1 is never used by msgpack and can't start a JSON document, so values
+# written by any serializer can be told apart when reading them back
+MSGPACK_TAG = b"\xc1"
+
+class Serializer(ABC):
+    """Encodes cache values to bytes and back."""
+
+    name: str
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value."""
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """Decode a value written by dumps."""
+
+class JSONSerializer(Serializer):
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+class OrjsonSerializer(Serializer):
+    """Same wire format as JSONSerializer, several times faster (needs orjson)."""
+
+    name = "orjson"
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+class MsgpackSerializer(Serializer):
+    """Compact binary encoding (needs msgpack)."""
+
+    name = "msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        return MSGPACK_TAG + msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data[1:], raw=False)
+
+def get_serializer(name: str) -> Serializer:
+    """Build the serializer named in settings; "auto" picks the fastest installed."""
+    if name == "auto":
+        name = "msgpack" if msgpack else "orjson" if orjson else "json"
+    if name == "msgpack" and msgpack:
+        return MsgpackSerializer()
+    if name == "orjson" and orjson:
+        return OrjsonSerializer()
+    if name != "json":
+        logger.warning(f"Cache serializer {name} unavailable, falling back to json")
+    return JSONSerializer()
+
+def loads(data: bytes) -> Any:
+    """Decode a value written by any serializer, including plain JSON from older releases."""
+    if data[:1] == MSGPACK_TAG:
+        return msgpack.unpackb(data[1:], raw=False)
+    return orjson.loads(data) if orjson else json.loads(data)
@@ -0,0 +1,206 @@
+from typing import Dict, Optional
+import uuid
+from redis import asyncio as aioredis
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Apply counter deltas to the seeded hash. While a seed is counting rows
+# (KEYS[3] held) they are buffered in KEYS[2] and merged once it finishes;
+# with neither, the row is already committed and the next seed counts it
+INCREMENT_SCRIPT = """
+local target = KEYS[1]
+if redis.call("exists", KEYS[1]) == 0 then
+    if redis.call("exists", KEYS[3]) == 0 then
+        return 0
+    end
+    target = KEYS[2]
+end
+for i = 1, #ARGV, 2 do
+    redis.call("hincrby", target, ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+# Take the seeding lock and start a fresh buffer of deltas
+BEGIN_SEED_SCRIPT = """
+if redis.call("set", KEYS[2], ARGV[1], "NX", "EX", ARGV[2]) then
+    redis.call("del", KEYS[1])
+    return 1
+end
+return 0
+"""
+
+# Seed the hash from a full count plus the deltas buffered while counting,
+# unless our lock expired or another process already seeded it
+FINISH_SEED_SCRIPT = """
+if redis.call("get", KEYS[3]) ~= ARGV[1] then
+    return 0
+end
+if redis.call("exists", KEYS[1]) == 0 then
+    redis.call("hset", KEYS[1], unpack(ARGV, 2))
+    local pending = redis.call("hgetall", KEYS[2])
+    for i = 1, #pending, 2 do
+        redis.call("hincrby", KEYS[1], pending[i], pending[i + 1])
+    end
+end
+redis.call("del", KEYS[2], KEYS[3])
+return 1
+"""
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = [0.5, 1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 300, 600]
+
+class StatsService:
+    """Animation statistics kept up to date as rows change.
+
+    Counts live in a Redis hash adjusted on create, update and delete, and
+    durations in fixed-bucket histograms, so reading them costs the same no
+    matter how many animations exist.
+
+    When the hash is missing it is seeded from a full count. Deltas sent
+    while that count runs are buffered and added on top, so rows created
+    meanwhile are not lost. A row committed just before the count whose
+    delta arrives after buffering started is counted twice; that window is
+    the gap between one commit and its delta.
+    """
+
+    COUNTS_KEY = "animation_stats:counts"
+    PENDING_KEY = "animation_stats:pending"
+    SEEDING_KEY = "animation_stats:seeding"
+    SEED_TIMEOUT = 60  # seconds a full count may take before the lock lapses
+    DESCRIPTION_CACHE_KEY = "animation_stats:description_cache"
+
+    def __init__(self):
+        self.redis = aioredis.from_url(settings.REDIS_URL)
+
+    def _histogram_key(self, name: str) -> str:
+        return f"animation_stats:{name}_seconds"
+
+    async def _increment(self, deltas: Dict[str, int]):
+        args = []
+        for field, delta in deltas.items():
+            args.extend([field, delta])
+        try:
+            await self.redis.eval(
+                INCREMENT_SCRIPT, 3, self.COUNTS_KEY, self.PENDING_KEY, self.SEEDING_KEY, *args
+            )
+        except Exception as e:
+            logger.error(f"Stats update error: {str(e)}")
+
+    async def record_created(self, quality: str):
+        await self._increment({"total": 1, f"quality:{quality}": 1})
+
+    async def record_quality_change(self, old_quality: str, new_quality: str):
+        if old_quality != new_quality:
+            await self._increment({f"quality:{old_quality}": -1, f"quality:{new_quality}": 1})
+
+    async def record_deleted(self, quality: str):
+        await self._increment({"total": -1, f"quality:{quality}": -1})
+
+    async def record_description_lookup(self, hit: bool):
+        try:
+            await self.redis.hincrby(self.DESCRIPTION_CACHE_KEY, "hits" if hit else "misses", 1)
+        except Exception as e:
+            logger.error(f"Stats update error: {str(e)}")
+
+    async def record_duration(self, name: str, seconds: float):
+        """Add a sample to the named duration histogram (e.g. render, processing)."""
+        bucket = next((str(b) for b in DURATION_BUCKETS if seconds <= b), "inf")
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                key = self._histogram_key(name)
+                pipe.hincrby(key, bucket, 1)
+                pipe.hincrby(key, "count", 1)
+                pipe.hincrbyfloat(key, "sum", seconds)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Stats update error: {str(e)}")
+
+    async def begin_seed(self) -> Optional[str]:
+        """Start buffering deltas before a full count.
+
+        Returns a token for finish_seed, or None if another process is
+        already seeding or Redis is unavailable.
+        """
+        token = uuid.uuid4().hex
+        try:
+            if await self.redis.eval(
+                BEGIN_SEED_SCRIPT, 2, self.PENDING_KEY, self.SEEDING_KEY, token, self.SEED_TIMEOUT
+            ):
+                return token
+        except Exception as e:
+            logger.error(f"Stats seed error: {str(e)}")
+        return None
+
+    async def finish_seed(self, token: str, total: int, quality_distribution: Dict[str, int]):
+        """Initialize the counters from a full count taken after begin_seed."""
+        args = ["total", total]
+        for quality, count in quality_distribution.items():
+            args.extend([f"quality:{quality}", count])
+        try:
+            await self.redis.eval(
+                FINISH_SEED_SCRIPT, 3, self.COUNTS_KEY, self.PENDING_KEY, self.SEEDING_KEY, token, *args
+            )
+        except Exception as e:
+            logger.error(f"Stats seed error: {str(e)}")
+
+    async def get_counts(self) -> Optional[dict]:
+        """Get the total and per-quality counts, or None if they need seeding
+        or Redis is unavailable."""
+        try:
+            counts = {k.decode(): int(v) for k, v in (await self.redis.hgetall(self.COUNTS_KEY)).items()}
+        except Exception as e:
+            logger.error(f"Stats read error: {str(e)}")
+            return None
+        if not counts:
+            return None
+        return {
+            "total_count": counts.get("total", 0),
+            "quality_distribution": {
+                field.split(":", 1)[1]: count
+                for field, count in counts.items()
+                if field.startswith("quality:") and count > 0
+            }
+        }
+
+    async def get_duration_stats(self, name: str) -> dict:
+        """Mean and p50/p90/p99 of a duration histogram.
+
+        Percentiles are interpolated within buckets, so they are estimates
+        accurate to the bucket width.
+        """
+        data = {k.decode(): float(v) for k, v in (await self.redis.hgetall(self._histogram_key(name))).items()}
+        count = int(data.get("count", 0))
+        stats = {"count": count, "mean": data.get("sum", 0.0) / count if count else 0.0}
+
+        for percentile in (50, 90, 99):
+            stats[f"p{percentile}"] = self._percentile(data, count, percentile / 100) if count else 0.0
+        return stats
+
+    def _percentile(self, data: dict, count: int, fraction: float) -> float:
+        target = fraction * count
+        seen = 0.0
+        lower = 0.0
+        for upper in DURATION_BUCKETS:
+            in_bucket = data.get(str(upper), 0.0)
+            if in_bucket and seen + in_bucket >= target:
+                return lower + (upper - lower) * (target - seen) / in_bucket
+            seen += in_bucket
+            lower = upper
+        # Beyond the last bucket; report its bound
+        return float(DURATION_BUCKETS[-1])
+
+    async def get_description_cache_stats(self) -> dict:
+        stats = {k.decode(): int(v) for k, v in (await self.redis.hgetall(self.DESCRIPTION_CACHE_KEY)).items()}
+        hits = stats.get("hits", 0)
+        misses = stats.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0
+        }
+
+# Create singleton instance
+stats_service = StatsService()
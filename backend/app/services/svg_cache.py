@@ -0,0 +1,53 @@
+from typing import List
+import os
+import time
+from app.core.config import settings
+from app.services.disk_lru import DiskLRUCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SvgCache(DiskLRUCache):
+    """Shared on-disk cache of compiled TeX and text SVGs.
+
+    Render workers mount the directory and read and publish entries
+    themselves (docker/svg_cache.py), bumping an entry's mtime on every hit.
+    This side keeps the directory under SVG_CACHE_MAX_BYTES by evicting the
+    least recently used entries, and keeps the hit counters in Redis.
+    """
+
+    NAME = "SVG cache"
+    STATS_KEY = "svg_cache:stats"
+    SUFFIX = ".svg"
+    SUBDIRS = ("tex", "text")
+
+    def __init__(self):
+        super().__init__(
+            settings.SVG_CACHE_PATH or os.path.join(settings.STORAGE_PATH, "svg_cache"),
+            settings.SVG_CACHE_MAX_BYTES
+        )
+
+    def ensure_path(self) -> str:
+        for directory in self._entry_dirs():
+            os.makedirs(directory, exist_ok=True)
+        return self.cache_path
+
+    def _entry_dirs(self) -> List[str]:
+        return [os.path.join(self.cache_path, subdir) for subdir in self.SUBDIRS]
+
+    def _after_evict_sync(self, max_age: float = 3600):
+        """Remove temp files left behind by workers that died mid-publish."""
+        cutoff = time.time() - max_age
+        for directory in self._entry_dirs():
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                try:
+                    if name.endswith(".tmp") and os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+# Create singleton instance
+svg_cache = SvgCache()
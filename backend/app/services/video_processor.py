@@ -1,14 +1,26 @@
 import os
-import subprocess
+import re
+import asyncio
 import logging
 from app.core.config import settings
 import tempfile
+from typing import Dict, Iterable, List, NamedTuple
 
 logger = logging.getLogger(__name__)
 
+class RenderSettings(NamedTuple):
+    """Native size and frame rate to render a scene at."""
+    width: int
+    height: int
+    fps: int
+
 class VideoProcessor:
     def __init__(self):
         self.ffmpeg_path = "ffmpeg"  # Assuming ffmpeg is in PATH
+        self.timeout = settings.FFMPEG_TIMEOUT
+        # Shared by every encode in this process so transcodes can't oversubscribe the CPU
+        self.max_concurrency = settings.FFMPEG_MAX_CONCURRENCY or os.cpu_count() or 1
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
         self.default_quality = "medium"  # low, medium, high
         self.quality_presets = {
             "low": {
@@ -28,59 +40,246 @@ class VideoProcessor:
             }
         }
 
-    async def optimize_video(self, input_path: str, quality: str = None) -> str:
-        """Optimize video for web delivery."""
-        try:
-            quality_settings = self.quality_presets[quality or self.default_quality]
-            
+    def _preset_height(self, quality: str) -> int:
+        return int(self.quality_presets[quality]["resolution"].rstrip("p"))
+
+    def get_render_settings(self, quality: str) -> RenderSettings:
+        """Size and frame rate Manim should render at for a quality preset.
+
+        Scenes are 16:9, so the width follows from the preset's height
+        (rounded to an even number for yuv420p).
+        """
+        height = self._preset_height(quality)
+        width = 2 * round(height * 16 / 9 / 2)
+        return RenderSettings(width, height, int(self.quality_presets[quality]["fps"]))
+
+    def get_rendition_ladder(self, quality: str) -> List[str]:
+        """Qualities to encode for a request, always including the requested one.
+
+        Rungs above the requested quality are left out, since the source is
+        rendered at that quality and would only be upscaled.
+        """
+        height = self._preset_height(quality)
+        ladder = [
+            q for q in settings.RENDITION_LADDER
+            if q in self.quality_presets and self._preset_height(q) <= height
+        ]
+        if quality not in ladder:
+            ladder.append(quality)
+        return ladder
+
+    async def fits_preset(self, video_path: str, quality: str) -> bool:
+        """Whether a video already has the preset's resolution and frame rate,
+        and no more than its bitrate, so it can be published without re-encoding.
+        """
+        quality_settings = self.quality_presets[quality]
+        info = await self.get_video_info(video_path)
+
+        resolution = re.search(r"(\d+)x(\d+)", info.get("resolution", ""))
+        fps = re.match(r"[\d.]+", info.get("fps", ""))
+        if not resolution or not fps:
+            return False
+        if int(resolution.group(2)) != self._preset_height(quality):
+            return False
+        if abs(float(fps.group()) - float(quality_settings["fps"])) > 0.01:
+            return False
+
+        bitrate = re.match(r"\d+", info.get("bitrate", ""))
+        if bitrate and "bitrate" in quality_settings:
+            return int(bitrate.group()) <= int(quality_settings["bitrate"].rstrip("k"))
+        return True
+
+    async def _run_ffmpeg(self, cmd: list, timeout: float = None) -> tuple:
+        """Run ffmpeg without blocking the event loop.
+
+        The process is killed if it exceeds the timeout or the calling task is
+        cancelled. Returns (returncode, stdout, stderr).
+        """
+        timeout = timeout or self.timeout
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise Exception(f"FFmpeg timed out after {timeout} seconds")
+            except asyncio.CancelledError:
+                process.kill()
+                await process.wait()
+                raise
+
+        return process.returncode, stdout, stderr
+
+    async def optimize_video(self, input_path: str, quality: str = None, output_path: str = None) -> str:
+        """Optimize video for web delivery.
+
+        Writes to output_path when given, otherwise to a new temp file.
+        """
+        quality = quality or self.default_quality
+        
+        if output_path is None:
             # Create temp file for output
             with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp_file:
                 output_path = tmp_file.name
 
+        outputs = await self.encode_renditions(input_path, {quality: output_path})
+        return outputs[quality]
+
+    async def encode_renditions(
+        self,
+        input_path: str,
+        outputs: Dict[str, str],
+        copy: Iterable[str] = ()
+    ) -> Dict[str, str]:
+        """Encode one input into several quality presets with a single ffmpeg run.
+
+        outputs maps quality name to output path. The input is decoded once and
+        split into one scaled stream per rendition. Qualities listed in copy
+        already fit the input and are only remuxed for web playback.
+        """
+        try:
+            copied = [quality for quality in outputs if quality in copy]
+            qualities = [quality for quality in outputs if quality not in copy]
+
             # Prepare ffmpeg command
             cmd = [
                 self.ffmpeg_path,
-                "-i", input_path,
-                "-c:v", "libx264",  # Video codec
-                "-preset", "medium",  # Encoding speed preset
-                "-crf", "23",  # Quality (lower = better, 18-28 is good)
-                "-c:a", "aac",  # Audio codec
-                "-b:a", "128k",  # Audio bitrate
-                "-movflags", "+faststart",  # Enable fast start for web playback
-                "-y",  # Overwrite output file
-                output_path
+                "-i", input_path
             ]
 
-            # Add quality-specific settings
-            if "resolution" in quality_settings:
-                height = quality_settings["resolution"].replace("p", "")
-                cmd.extend(["-vf", f"scale=-2:{height}"])
-            
-            if "fps" in quality_settings:
-                cmd.extend(["-r", quality_settings["fps"]])
-            
-            if "bitrate" in quality_settings:
-                cmd.extend(["-b:v", quality_settings["bitrate"]])
+            if qualities:
+                # Decode once, then split/scale per rendition
+                filters = [f"[0:v]split={len(qualities)}" + "".join(f"[s{i}]" for i in range(len(qualities)))]
+                for i, quality in enumerate(qualities):
+                    quality_settings = self.quality_presets[quality]
+                    chain = []
+                    if "resolution" in quality_settings:
+                        height = quality_settings["resolution"].replace("p", "")
+                        chain.append(f"scale=-2:{height}")
+                    if "fps" in quality_settings:
+                        chain.append(f"fps={quality_settings['fps']}")
+                    filters.append(f"[s{i}]{','.join(chain) or 'null'}[v{i}]")
+                cmd.extend(["-filter_complex", ";".join(filters)])
+
+            for quality in copied:
+                cmd.extend([
+                    "-map", "0:v",
+                    "-map", "0:a?",
+                    "-c", "copy",  # Already at this preset, no re-encode
+                    "-movflags", "+faststart",
+                    "-y",
+                    outputs[quality]
+                ])
+
+            for i, quality in enumerate(qualities):
+                quality_settings = self.quality_presets[quality]
+                cmd.extend([
+                    "-map", f"[v{i}]",
+                    "-map", "0:a?",  # Audio, if the scene has any
+                    "-c:v", "libx264",  # Video codec
+                    "-preset", "medium",  # Encoding speed preset
+                    "-crf", "23",  # Quality (lower = better, 18-28 is good)
+                    "-c:a", "aac",  # Audio codec
+                    "-b:a", "128k",  # Audio bitrate
+                    "-movflags", "+faststart",  # Enable fast start for web playback
+                ])
+                if "bitrate" in quality_settings:
+                    cmd.extend(["-b:v", quality_settings["bitrate"]])
+                if settings.STREAMING_ENABLED:
+                    # Keyframes on segment boundaries so renditions can be
+                    # packaged without re-encoding and switched between
+                    cmd.extend([
+                        "-force_key_frames",
+                        f"expr:gte(t,n_forced*{settings.STREAMING_SEGMENT_SECONDS})"
+                    ])
+                cmd.extend([
+                    "-y",  # Overwrite output file
+                    outputs[quality]
+                ])
 
             # Run ffmpeg
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            stdout, stderr = process.communicate()
+            returncode, stdout, stderr = await self._run_ffmpeg(cmd)
 
-            if process.returncode != 0:
+            if returncode != 0:
                 logger.error(f"FFmpeg error: {stderr.decode()}")
                 raise Exception("Video optimization failed")
 
-            logger.info(f"Video optimized: {output_path}")
-            return output_path
+            logger.info(f"Video optimized: {outputs}")
+            return outputs
 
         except Exception as e:
             logger.error(f"Video optimization error: {str(e)}")
             raise
 
+    async def package_streams(self, renditions: Dict[str, str], output_dir: str, formats: List[str]) -> Dict[str, str]:
+        """Package encoded renditions as segmented HLS and/or DASH.
+
+        Streams are copied, not re-encoded. Returns a map of format to the
+        path of its master playlist or manifest inside output_dir.
+        """
+        try:
+            qualities = list(renditions)
+            segment_seconds = str(settings.STREAMING_SEGMENT_SECONDS)
+
+            inputs = []
+            maps = []
+            for i, quality in enumerate(qualities):
+                inputs.extend(["-i", renditions[quality]])
+                maps.extend(["-map", f"{i}:v:0"])
+
+            manifests = {}
+            for stream_format in formats:
+                cmd = [self.ffmpeg_path, *inputs, *maps, "-c", "copy"]
+
+                if stream_format == "hls":
+                    manifest = os.path.join(output_dir, "master.m3u8")
+                    cmd.extend([
+                        "-f", "hls",
+                        "-hls_time", segment_seconds,
+                        "-hls_playlist_type", "vod",
+                        "-hls_segment_filename", os.path.join(output_dir, "%v_%03d.ts"),
+                        "-master_pl_name", os.path.basename(manifest),
+                        "-var_stream_map", " ".join(
+                            f"v:{i},name:{quality}" for i, quality in enumerate(qualities)
+                        ),
+                        os.path.join(output_dir, "%v.m3u8")
+                    ])
+                elif stream_format == "dash":
+                    manifest = os.path.join(output_dir, "manifest.mpd")
+                    cmd.extend([
+                        "-f", "dash",
+                        "-seg_duration", segment_seconds,
+                        "-use_template", "1",
+                        "-use_timeline", "1",
+                        "-adaptation_sets", "id=0,streams=v",
+                        manifest
+                    ])
+                else:
+                    raise ValueError(f"Unsupported streaming format: {stream_format}")
+
+                returncode, stdout, stderr = await self._run_ffmpeg(cmd)
+                if returncode != 0:
+                    logger.error(f"FFmpeg error: {stderr.decode()}")
+                    raise Exception(f"{stream_format.upper()} packaging failed")
+
+                manifests[stream_format] = manifest
+
+            logger.info(f"Streams packaged: {manifests}")
+            return manifests
+
+        except Exception as e:
+            logger.error(f"Stream packaging error: {str(e)}")
+            raise
+
     async def get_video_info(self, video_path: str) -> dict:
         """Get video metadata."""
         try:
@@ -89,12 +288,7 @@ class VideoProcessor:
                 "-i", video_path
             ]
             
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            stdout, stderr = process.communicate()
+            returncode, stdout, stderr = await self._run_ffmpeg(cmd, timeout=30)
 
             # Parse ffmpeg output
             info = {}
@@ -0,0 +1,252 @@
+"""Render worker process.
+
+Pulls animation jobs off the Redis queue and runs the GPT -> Manim -> ffmpeg
+pipeline outside of the API process. Start one or more with:
+
+    python -m app.worker
+"""
+import asyncio
+import logging
+import signal
+import time
+from datetime import datetime
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.animation import AnimationRequest, AnimationResponse
+from app.services.animation_service import AnimationService
+from app.services.gpt_service import gpt_service
+from app.services.job_service import job_service
+from app.services.manim_service import manim_service
+from app.services.render_pool import render_pool
+from app.services.semantic_cache import semantic_cache
+from app.services.stats_service import stats_service
+
+logger = logging.getLogger(__name__)
+
+animation_service = AnimationService()
+
+async def publish_preview(
+    job_id: str,
+    animation_id: int,
+    manim_code: str,
+    quality: str,
+    render_task: asyncio.Task
+):
+    """Render a quick preview alongside the full render and publish it first.
+
+    The preview URL goes into the Animation row and the job, and is replaced
+    in place once the full render finishes. Runs in its own database session,
+    since it is cancelled as soon as the full render is done. A failed
+    preview only logs.
+    """
+    async def report(phase: str, **details):
+        await job_service.publish_event(job_id, phase, preview=True, **details)
+
+    try:
+        preview_url = await manim_service.create_preview(manim_code, animation_id, progress_callback=report)
+    except Exception as e:
+        logger.error(f"Preview for job {job_id} failed: {str(e)}")
+        return
+
+    if render_task.done():
+        # The full render won the race; no point showing the preview
+        return
+
+    async with SessionLocal() as db:
+        await animation_service.update_animation(
+            db,
+            animation_id=animation_id,
+            animation_url=preview_url,
+            quality=quality
+        )
+    await job_service.update_job(job_id, status="preview_ready", preview_url=preview_url)
+    await job_service.publish_event(job_id, "preview_ready", preview_url=preview_url)
+    logger.info(f"Job {job_id} published preview: {preview_url}")
+
+async def process_job(job: dict):
+    """Run the full animation pipeline for a single job."""
+    job_id = job["job_id"]
+    request = AnimationRequest(**job["request"])
+    start_time = time.time()
+
+    await job_service.update_job(
+        job_id,
+        status="running",
+        started_at=datetime.utcnow().isoformat(),
+        attempts=job.get("attempts", 0) + 1
+    )
+
+    async def report(phase: str, **details):
+        await job_service.publish_event(job_id, phase, **details)
+
+    await report("started")
+
+    db = SessionLocal()
+    heartbeat = asyncio.create_task(job_service.keep_alive(job_id))
+    try:
+        # Reuse the scene code of an earlier request for the same description,
+        # e.g. one asking for a different quality
+        cached_animation = await animation_service.get_cached_animation(request.description, request.quality)
+        is_new_description = cached_animation is None
+        description_vector = None
+        if cached_animation is None:
+            # Fall back to an earlier request that was worded differently
+            description_vector = await semantic_cache.embed(request.description)
+            cached_animation = await animation_service.find_similar_animation(
+                db, request.description, description_vector
+            )
+
+        if cached_animation is not None:
+            await report(
+                "reusing_code",
+                source="semantic_cache" if is_new_description else "description_cache",
+                animation_id=cached_animation.id
+            )
+            manim_code = cached_animation.manim_code
+        else:
+            # Convert natural language to Manim code
+            manim_code = await gpt_service.generate_manim_code(
+                request.description,
+                progress_callback=report
+            )
+
+        # Store in database
+        db_animation = await animation_service.create_animation(
+            db=db,
+            request=request,
+            manim_code=manim_code
+        )
+
+        # Render, optimize and save the video. Only renders that actually ran
+        # Manim go into the render histogram, not render cache hits
+        rendered = False
+
+        async def render_report(phase: str, **details):
+            nonlocal rendered
+            rendered = rendered or phase == "rendering"
+            await report(phase, **details)
+
+        render_start = time.time()
+        render_task = asyncio.create_task(manim_service.create_animation(
+            manim_code=manim_code,
+            animation_id=db_animation.id,
+            quality=request.quality,
+            progress_callback=render_report
+        ))
+        preview_task = None
+        try:
+            if (
+                settings.PREVIEW_ENABLED
+                and request.quality != "low"
+                and not await manim_service.has_rendition(manim_code, db_animation.id, request.quality)
+            ):
+                preview_task = asyncio.create_task(publish_preview(
+                    job_id, db_animation.id, manim_code, request.quality, render_task
+                ))
+            animation_url = await render_task
+        finally:
+            render_task.cancel()
+            if preview_task is not None:
+                # Stop the preview and wait for it to unwind, so a preview
+                # URL being published can't land after the full render's
+                preview_task.cancel()
+                await asyncio.gather(preview_task, return_exceptions=True)
+        if rendered:
+            await stats_service.record_duration("render", time.time() - render_start)
+
+        await animation_service.update_animation(
+            db,
+            animation_id=db_animation.id,
+            animation_url=animation_url,
+            quality=request.quality
+        )
+        if preview_task is not None:
+            manim_service.discard_preview(db_animation.id)
+
+        if is_new_description:
+            await semantic_cache.add(request.description, db_animation.id, description_vector)
+
+        stream_urls = manim_service.get_stream_urls(manim_code, request.quality)
+        result = AnimationResponse(
+            status="success",
+            animation_url=animation_url,
+            processing_time=time.time() - start_time,
+            quality=request.quality,
+            playlist_url=stream_urls.get("hls"),
+            dash_url=stream_urls.get("dash")
+        )
+        await job_service.update_job(
+            job_id,
+            status="completed",
+            finished_at=datetime.utcnow().isoformat(),
+            result=result.model_dump(mode="json")
+        )
+        await report("completed", result=result.model_dump(mode="json"))
+        await stats_service.record_duration("processing", result.processing_time)
+        logger.info(f"Job {job_id} completed in {result.processing_time:.1f}s")
+
+    except (Exception, asyncio.CancelledError) as e:
+        # Cancellation (e.g. the worker shutting down) is not an Exception,
+        # but still must not leave the job "running" until it expires
+        error = str(e) if isinstance(e, Exception) else "The worker shut down while processing this job"
+        logger.error(f"Job {job_id} failed: {error}")
+        await job_service.update_job(
+            job_id,
+            status="failed",
+            finished_at=datetime.utcnow().isoformat(),
+            error=error
+        )
+        await report("failed", error=error)
+        if isinstance(e, asyncio.CancelledError):
+            raise
+    finally:
+        heartbeat.cancel()
+        await db.close()
+        await job_service.release_job(job)
+        await job_service.ack_job(job_id)
+
+    try:
+        await animation_service.cleanup_old_files()
+    except Exception as e:
+        logger.error(f"File cleanup failed: {str(e)}")
+
+async def worker_loop(worker_id: int):
+    """Process jobs one at a time until cancelled."""
+    logger.info(f"Worker loop {worker_id} started")
+    while True:
+        try:
+            job = await job_service.dequeue(timeout=5)
+        except Exception as e:
+            logger.error(f"Failed to dequeue job: {str(e)}")
+            await asyncio.sleep(1)
+            continue
+
+        if job is not None:
+            await process_job(job)
+
+async def reaper_loop():
+    """Requeue or fail jobs abandoned by workers that died mid-job."""
+    while True:
+        await asyncio.sleep(settings.JOB_HEARTBEAT_TTL)
+        try:
+            await job_service.reap_abandoned_jobs()
+        except Exception as e:
+            logger.error(f"Failed to reap abandoned jobs: {str(e)}")
+
+async def run_worker(concurrency: int = None):
+    concurrency = concurrency or settings.WORKER_CONCURRENCY
+    # Turn SIGTERM (e.g. a redeploy) into cancellation, so running jobs are
+    # marked failed and taken off the processing list before exiting
+    main_task = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, main_task.cancel)
+    try:
+        await asyncio.gather(reaper_loop(), *(worker_loop(i) for i in range(concurrency)))
+    finally:
+        await render_pool.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run_worker())
+    except asyncio.CancelledError:
+        logger.info("Worker stopped")
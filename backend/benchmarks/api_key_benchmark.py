@@ -0,0 +1,46 @@
+"""Compare API key lookup cost as the number of keys grows.
+
+"linear scan" is the old verify_api_key loop over settings.API_KEYS; "index"
+is APIKeyIndex. Each lookup presents a random valid key or an unknown one.
+
+    python -m benchmarks.api_key_benchmark --sizes 10 100 1000 10000
+"""
+import argparse
+import random
+import secrets
+import time
+from app.core.config import APIKey
+from app.core.middleware import APIKeyIndex
+
+def linear_scan(api_keys: dict, api_key: str):
+    for key_obj in api_keys.values():
+        if key_obj.key == api_key:
+            return key_obj
+    return None
+
+def measure(lookup, presented: list) -> float:
+    began = time.perf_counter()
+    for api_key in presented:
+        lookup(api_key)
+    return (time.perf_counter() - began) / len(presented) * 1e6
+
+def main(args):
+    for size in args.sizes:
+        api_keys = {f"client_{i}": APIKey(key=secrets.token_urlsafe(32), units_per_minute=60) for i in range(size)}
+        known = [key_obj.key for key_obj in api_keys.values()]
+        presented = [
+            random.choice(known) if random.random() < 0.9 else secrets.token_urlsafe(32)
+            for _ in range(args.lookups)
+        ]
+        index = APIKeyIndex(api_keys.values())
+
+        assert all(index.lookup(key) is linear_scan(api_keys, key) for key in presented[:100])
+        scan_us = measure(lambda key: linear_scan(api_keys, key), presented)
+        index_us = measure(index.lookup, presented)
+        print(f"{size:>6} keys  linear scan={scan_us:9.2f}us  index={index_us:6.2f}us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--lookups", type=int, default=20000)
+    main(parser.parse_args())
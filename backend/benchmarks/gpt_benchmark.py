@@ -0,0 +1,64 @@
+"""Benchmark GPTService against the local fake completion server.
+
+Fires concurrent generate_manim_code calls and measures throughput plus
+event loop lag, which stays near zero now that the client is async.
+
+    python -m benchmarks.gpt_benchmark --requests 50 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uvicorn
+from tests.fake_openai_server import create_app
+
+async def measure_loop_lag(stop: asyncio.Event, samples: list, interval: float = 0.01):
+    while not stop.is_set():
+        began = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - began - interval)
+
+async def main(args):
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    from app.core.config import settings
+    from app.services.gpt_service import GPTService
+
+    server = uvicorn.Server(uvicorn.Config(create_app(args.latency), port=args.port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    service = GPTService()
+    lag = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lag))
+
+    latencies = []
+
+    async def one_call(i: int):
+        began = time.perf_counter()
+        await service.generate_manim_code(f"benchmark animation number {i}")
+        latencies.append(time.perf_counter() - began)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(one_call(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - began
+
+    stop.set()
+    await lag_task
+    await service.http_client.aclose()
+    server.should_exit = True
+    await server_task
+
+    print(f"requests={args.requests} concurrency cap={settings.OPENAI_MAX_CONCURRENT_REQUESTS} fake latency={args.latency}s")
+    print(f"wall time={elapsed:.2f}s throughput={args.requests / elapsed:.1f} req/s")
+    print(f"call latency p50={statistics.median(latencies):.2f}s max={max(latencies):.2f}s")
+    print(f"event loop lag p50={statistics.median(lag) * 1000:.1f}ms max={max(lag) * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=8766)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+"""Compare the media route against the stock StaticFiles mount for seek-heavy clients.
+
+Each client repeatedly requests a random byte range of one large video, the
+way a player does while scrubbing. StaticFiles ignores Range headers, so it
+sends the whole file every time.
+
+    python -m benchmarks.media_benchmark --size-mb 50 --clients 20 --requests 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from app.core.config import settings
+from app.api.routes import media
+
+FILENAME = "benchmark_media.mp4"
+
+def build_apps(storage_path: str) -> dict:
+    static_app = FastAPI()
+    static_app.mount("/storage", StaticFiles(directory=storage_path), name="storage")
+
+    media_app = FastAPI()
+    media_app.include_router(media.router)
+
+    return {"StaticFiles": static_app, "media route": media_app}
+
+async def run_clients(port: int, size: int, clients: int, requests: int, range_size: int) -> dict:
+    url = f"http://127.0.0.1:{port}/storage/animations/{FILENAME}"
+    transferred = 0
+    latencies = []
+
+    async def client(http: httpx.AsyncClient):
+        nonlocal transferred
+        for _ in range(requests):
+            start = random.randrange(0, size - range_size)
+            began = time.perf_counter()
+            response = await http.get(url, headers={"Range": f"bytes={start}-{start + range_size - 1}"})
+            latencies.append(time.perf_counter() - began)
+            transferred += len(response.content)
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as http:
+        began = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(clients)))
+        elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    return {
+        "requests_per_second": clients * requests / elapsed,
+        "megabytes_sent": transferred / 1024 / 1024,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+async def main(args):
+    animations_path = os.path.join(settings.STORAGE_PATH, "animations")
+    os.makedirs(animations_path, exist_ok=True)
+    path = os.path.join(animations_path, FILENAME)
+    size = args.size_mb * 1024 * 1024
+    with open(path, "wb") as f:
+        f.write(os.urandom(size))
+
+    try:
+        for port, (label, app) in enumerate(build_apps(settings.STORAGE_PATH).items(), start=args.port):
+            server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+            task = asyncio.create_task(server.serve())
+            while not server.started:
+                await asyncio.sleep(0.05)
+
+            result = await run_clients(port, size, args.clients, args.requests, args.range_kb * 1024)
+            print(
+                f"{label:<12} {result['requests_per_second']:8.1f} req/s "
+                f"p50={result['p50_ms']:.1f}ms p99={result['p99_ms']:.1f}ms "
+                f"sent={result['megabytes_sent']:.0f}MB"
+            )
+
+            server.should_exit = True
+            await task
+    finally:
+        os.remove(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--range-kb", type=int, default=512)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+"""Compare cold `docker run` renders against the warm render pool.
+
+Requires Docker and the manim-env image (built from docker/manim.Dockerfile).
+
+    python -m benchmarks.render_pool_benchmark --runs 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from app.services.manim_executor import ManimExecutor
+from app.services.render_pool import render_pool
+
+SCENE_CODE = """from manim import *
+
+class BenchmarkScene(Scene):
+    def construct(self):
+        square = Square()
+        self.play(Create(square))
+        self.play(Transform(square, Circle()))
+        self.wait(0.5)
+"""
+
+async def time_renders(executor: ManimExecutor, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await executor.execute_manim_code(SCENE_CODE)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def report(label: str, timings: list):
+    print(
+        f"{label:<12} runs={len(timings)} "
+        f"mean={statistics.mean(timings):.2f}s "
+        f"median={statistics.median(timings):.2f}s "
+        f"min={min(timings):.2f}s max={max(timings):.2f}s"
+    )
+
+async def main(runs: int):
+    cold = await time_renders(ManimExecutor(use_pool=False), runs)
+
+    warm_executor = ManimExecutor(use_pool=True)
+    # First pool render pays for starting the worker; report it separately
+    start = time.perf_counter()
+    await warm_executor.execute_manim_code(SCENE_CODE)
+    first = time.perf_counter() - start
+    warm = await time_renders(warm_executor, runs)
+    await render_pool.close()
+
+    report("cold", cold)
+    print(f"{'pool start':<12} {first:.2f}s")
+    report("warm pool", warm)
+    print(f"speedup (median): {statistics.median(cold) / statistics.median(warm):.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
@@ -0,0 +1,111 @@
+"""Compare cache serializers on animation records.
+
+"json dicts" is the old path: each row as a dict, encoded with the stdlib
+json module. The rest encode the positional records from app.models.records.
+
+    python -m benchmarks.serializer_benchmark --rows 50 --iterations 2000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from app.models.db_models import Animation
+from app.models.records import animations_to_records, animations_from_records
+from app.services import serializers
+
+MANIM_CODE = """from manim import *
+
+class PythagoreanTheorem(Scene):
+    def construct(self):
+        triangle = Polygon(ORIGIN, RIGHT * 3, UP * 4, color=BLUE)
+        labels = VGroup(MathTex("a"), MathTex("b"), MathTex("c"))
+        self.play(Create(triangle))
+        self.play(Write(labels))
+        self.wait()
+""" * 4
+
+def make_animations(rows: int) -> list:
+    return [
+        Animation(
+            id=i,
+            description=f"Visualize the Pythagorean theorem, variant {i}",
+            manim_code=MANIM_CODE,
+            animation_url=f"/storage/animations/animation_{i}_medium.mp4",
+            quality="medium",
+            created_at=datetime.now(timezone.utc),
+            user_id=None,
+        )
+        for i in range(rows)
+    ]
+
+def json_dicts(animations: list):
+    def encode():
+        return json.dumps([
+            {
+                "id": a.id,
+                "description": a.description,
+                "manim_code": a.manim_code,
+                "animation_url": a.animation_url,
+                "quality": a.quality,
+                "created_at": a.created_at.isoformat(),
+                "user_id": a.user_id,
+            }
+            for a in animations
+        ]).encode()
+
+    def decode(data: bytes):
+        rows = json.loads(data)
+        for row in rows:
+            row["created_at"] = datetime.fromisoformat(row["created_at"])
+        return [Animation(**row) for row in rows]
+
+    return encode, decode
+
+def records(animations: list, serializer: serializers.Serializer):
+    def encode():
+        return serializer.dumps(animations_to_records(animations))
+
+    def decode(data: bytes):
+        return animations_from_records(serializers.loads(data))
+
+    return encode, decode
+
+def measure(encode, decode, iterations: int) -> dict:
+    data = encode()
+    began = time.perf_counter()
+    for _ in range(iterations):
+        encode()
+    encode_us = (time.perf_counter() - began) / iterations * 1e6
+
+    began = time.perf_counter()
+    for _ in range(iterations):
+        decode(data)
+    decode_us = (time.perf_counter() - began) / iterations * 1e6
+    return {"encode_us": encode_us, "decode_us": decode_us, "size": len(data)}
+
+def main(args):
+    animations = make_animations(args.rows)
+    candidates = {"json dicts": json_dicts(animations)}
+    for name in ("json", "orjson", "msgpack"):
+        serializer = serializers.get_serializer(name)
+        if serializer.name == name:
+            candidates[f"{name} records"] = records(animations, serializer)
+
+    # Round trip check before timing anything
+    for label, (encode, decode) in candidates.items():
+        decoded = decode(encode())
+        assert [a.id for a in decoded] == [a.id for a in animations], label
+        assert decoded[-1].created_at == animations[-1].created_at, label
+
+    for label, (encode, decode) in candidates.items():
+        result = measure(encode, decode, args.iterations)
+        print(
+            f"{label:<16} encode={result['encode_us']:8.1f}us "
+            f"decode={result['decode_us']:8.1f}us size={result['size']}B"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=2000)
+    main(parser.parse_args())
@@ -0,0 +1,118 @@
+"""Long-lived Manim render worker.
+
+Runs inside the manim-env container with manim already imported and renders
+scenes on request. The host talks to it over stdin/stdout, one JSON object
+per line:
+
+    request:  {"id": "...", "workdir": "/workspace/job", "scene_file": "scene.py",
+               "scene_class": "MyScene", "pixel_width": 1280, "pixel_height": 720,
+               "frame_rate": 30}
+    response: {"id": "...", "ok": true, "output": "media/videos/.../MyScene.mp4",
+               "svg_cache": {"hits": 3, "misses": 1}}
+              {"id": "...", "ok": false, "error": "...", "svg_cache": {...}}
+
+With --isolation fork (the default) every job renders in a forked child, so
+scene code can't leak module or config state into later jobs while still
+sharing the already-imported manim pages with the parent.
+
+With --svg-cache DIR, compiled TeX and text SVGs are shared through DIR
+across jobs and workers (see svg_cache.py).
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import traceback
+
+# Manim's rich console writes to stdout, so keep the real stdout for the
+# protocol and send everything else to stderr.
+protocol_out = os.fdopen(os.dup(1), "w", buffering=1)
+os.dup2(2, 1)
+
+import manim  # noqa: E402  (preload manim, numpy and cairo once)
+from manim import tempconfig  # noqa: E402
+import svg_cache  # noqa: E402
+
+
+def render_scene(job: dict) -> str:
+    """Render one scene in the current process and return the video path."""
+    workdir = job["workdir"]
+    os.chdir(workdir)
+
+    spec = importlib.util.spec_from_file_location(
+        f"scene_{job['id']}", os.path.join(workdir, job["scene_file"])
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    scene_class = getattr(module, job["scene_class"])
+
+    with tempconfig({
+        "pixel_width": job.get("pixel_width", 1280),
+        "pixel_height": job.get("pixel_height", 720),
+        "frame_rate": job.get("frame_rate", 30),
+        "media_dir": os.path.join(workdir, "media"),
+        "input_file": os.path.join(workdir, job["scene_file"]),
+    }):
+        scene = scene_class()
+        scene.render()
+        output = scene.renderer.file_writer.movie_file_path
+
+    return os.path.relpath(str(output), workdir)
+
+
+def run_job(job: dict) -> dict:
+    svg_cache.reset_stats()
+    try:
+        result = {"id": job["id"], "ok": True, "output": render_scene(job)}
+    except BaseException as e:
+        traceback.print_exc()
+        result = {"id": job["id"], "ok": False, "error": f"{type(e).__name__}: {e}"}
+    result["svg_cache"] = dict(svg_cache.stats)
+    return result
+
+
+def run_job_forked(job: dict) -> dict:
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        result = run_job(job)
+        with os.fdopen(write_fd, "w") as f:
+            f.write(json.dumps(result))
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        payload = f.read()
+    _, status = os.waitpid(pid, 0)
+
+    if not payload:
+        return {"id": job["id"], "ok": False, "error": f"Render process exited with status {status}"}
+    return json.loads(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--isolation", choices=["fork", "none"], default="fork")
+    parser.add_argument("--svg-cache", default=None)
+    args = parser.parse_args()
+
+    if args.svg_cache:
+        svg_cache.install(args.svg_cache)
+
+    protocol_out.write(json.dumps({"ready": True, "manim_version": manim.__version__}) + "\n")
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        if args.isolation == "fork":
+            result = run_job_forked(job)
+        else:
+            result = run_job(job)
+        protocol_out.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
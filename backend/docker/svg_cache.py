@@ -0,0 +1,114 @@
+"""Shared cache of compiled TeX and text SVGs for the render worker.
+
+Manim caches the SVGs it builds for MathTex/Tex (LaTeX + dvisvgm) and
+Text/MarkupText (Pango) under media/Tex and media/texts, but every job gets a
+fresh media directory, so those caches never survive a render. install()
+wraps the functions that build them so every worker looks in one shared
+directory first:
+
+    <cache_dir>/tex/<hash>.svg
+    <cache_dir>/text/<hash>.svg
+
+Entries are published with an atomic rename, so concurrent workers never see
+a partial file, and their mtime is bumped on every hit. The API side
+(app/services/svg_cache.py) evicts by mtime once the directory grows past its
+size limit and aggregates the per-job hit counts from stats.
+"""
+import hashlib
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from manim import config
+from manim.mobject.text import tex_mobject, text_mobject
+
+# Lookups since the last reset, reported back with each job result
+stats = {"hits": 0, "misses": 0}
+
+
+def reset_stats():
+    stats["hits"] = 0
+    stats["misses"] = 0
+
+
+def _link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        # The cache and the job directory are separate mounts
+        shutil.copyfile(source, target)
+
+
+def _lookup(cache_path: Path, local_path: Path) -> bool:
+    """Copy a cached SVG to local_path; False on a miss."""
+    try:
+        os.utime(cache_path)
+        _link_or_copy(cache_path, local_path)
+    except FileNotFoundError:
+        stats["misses"] += 1
+        return False
+    stats["hits"] += 1
+    return True
+
+
+def _publish(local_path: Path, cache_path: Path):
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        shutil.copyfile(local_path, tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # A failed publish only costs a future cache hit
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def install(cache_dir: str):
+    """Route Manim's TeX and text SVG generation through the shared cache."""
+    tex_dir = Path(cache_dir, "tex")
+    text_dir = Path(cache_dir, "text")
+    tex_dir.mkdir(parents=True, exist_ok=True)
+    text_dir.mkdir(parents=True, exist_ok=True)
+
+    compile_tex_svg = tex_mobject.tex_to_svg_file
+
+    def tex_to_svg_file(expression, environment=None, tex_template=None):
+        tex_template = tex_template or config["tex_template"]
+        if environment is not None:
+            tex_code = tex_template.get_texcode_for_expression_in_env(expression, environment)
+        else:
+            tex_code = tex_template.get_texcode_for_expression(expression)
+        key = hashlib.sha256(
+            f"{tex_template.tex_compiler}\0{tex_template.output_format}\0{tex_code}".encode()
+        ).hexdigest()
+
+        local_dir = config.get_dir("tex_dir")
+        local_dir.mkdir(parents=True, exist_ok=True)
+        local_path = local_dir / f"{key}.svg"
+        if _lookup(tex_dir / local_path.name, local_path):
+            return local_path
+
+        svg_file = compile_tex_svg(expression, environment=environment, tex_template=tex_template)
+        _publish(Path(svg_file), tex_dir / local_path.name)
+        return svg_file
+
+    tex_mobject.tex_to_svg_file = tex_to_svg_file
+
+    def cached_text2svg(text2svg):
+        def wrapper(self, color):
+            local_dir = config.get_dir("text_dir")
+            local_dir.mkdir(parents=True, exist_ok=True)
+            text_hash = self._text2hash(color)
+            # Manim's own file name, so it treats the copy as already rendered
+            local_path = local_dir / f"{text_hash}.svg"
+            name = f"{type(self).__name__}_{text_hash}.svg"
+            if _lookup(text_dir / name, local_path):
+                return str(local_path.resolve())
+
+            svg_file = text2svg(self, color)
+            _publish(Path(svg_file), text_dir / name)
+            return svg_file
+        return wrapper
+
+    text_mobject.Text._text2svg = cached_text2svg(text_mobject.Text._text2svg)
+    text_mobject.MarkupText._text2svg = cached_text2svg(text_mobject.MarkupText._text2svg)
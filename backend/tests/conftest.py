@@ -0,0 +1,13 @@
+import os
+import tempfile
+
+# Settings are read at import time, so give the required ones test values
+# before any app module is imported
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
+os.environ.setdefault("STORAGE_PATH", tempfile.mkdtemp())
+os.environ.setdefault("LOCAL_CACHE_ENABLED", "false")
+
+# A Manim scene for checking the rendering setup by hand, not a pytest module
+collect_ignore = ["test_manim.py"]
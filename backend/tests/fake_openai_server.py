@@ -0,0 +1,63 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Returns a fixed, valid Manim scene after a configurable delay so GPTService
+can be exercised and benchmarked offline. The tests mount it in-process
+through httpx.ASGITransport; to run it standalone, point the app at it with
+OPENAI_BASE_URL=http://127.0.0.1:8766/v1.
+
+    python -m tests.fake_openai_server --port 8766 --latency 0.5
+"""
+import argparse
+import asyncio
+import time
+import uuid
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+SCENE_CODE = """from manim import *
+
+class SquareToCircle(Scene):
+    def construct(self):
+        square = Square()
+        self.play(Create(square))
+        self.play(Transform(square, Circle()))
+        self.wait()
+"""
+
+def create_app(latency: float = 0.5, failures: int = 0) -> FastAPI:
+    """Build the server; the first `failures` requests get a 500 to exercise retries."""
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        await asyncio.sleep(latency)
+        if app.state.requests <= failures:
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "Injected failure", "type": "server_error"}}
+            )
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": SCENE_CODE},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency), host="127.0.0.1", port=args.port)
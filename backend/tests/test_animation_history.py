@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime, timedelta
+import fakeredis
+import pytest
+from app.core.database import Base, SessionLocal, engine
+from app.models.db_models import Animation
+from app.services.animation_service import AnimationService, decode_cursor, encode_cursor
+
+START = datetime(2024, 1, 1)
+
+async def seed():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionLocal() as db:
+        for i in range(1, 8):
+            db.add(Animation(
+                id=i,
+                description=f"animation {i}",
+                manim_code="",
+                quality="high" if i % 2 else "low",
+                # Pairs share a timestamp, so ties are broken by id
+                created_at=START + timedelta(minutes=i // 2)
+            ))
+        await db.commit()
+
+def make_service() -> AnimationService:
+    service = AnimationService()
+    service.cache_service.redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    return service
+
+async def collect_pages(service, **filters):
+    pages = []
+    cursor = None
+    async with SessionLocal() as db:
+        while True:
+            items, cursor = await service.get_animation_history(db, limit=3, cursor=cursor, **filters)
+            pages.append([item.id for item in items])
+            if cursor is None:
+                return pages
+
+def test_pages_cover_every_row_once_newest_first():
+    async def main():
+        await seed()
+        return await collect_pages(make_service())
+
+    assert asyncio.run(main()) == [[7, 6, 5], [4, 3, 2], [1]]
+
+def test_filters_apply_across_pages():
+    async def main():
+        await seed()
+        return await collect_pages(make_service(), quality="high")
+
+    assert asyncio.run(main()) == [[7, 5, 3], [1]]
+
+def test_cached_pages_match_fresh_ones():
+    async def main():
+        await seed()
+        service = make_service()
+        first = await collect_pages(service)
+        second = await collect_pages(service)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == second
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor(START, 5)) == (START, 5)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
@@ -0,0 +1,28 @@
+import asyncio
+import fakeredis
+from starlette.requests import Request
+from app.api.routes import animation as routes
+from app.models.animation import AnimationRequest
+from app.services.job_service import job_service
+
+REQUEST = AnimationRequest(description="a square turning into a circle", quality="medium")
+
+def test_event_stream_ends_from_the_job_record_when_the_final_event_is_lost(monkeypatch):
+    monkeypatch.setattr(job_service, "redis", fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer()))
+
+    async def heartbeats(job_id, after=0):
+        while True:
+            yield None, None
+
+    monkeypatch.setattr(job_service, "stream_events", heartbeats)
+
+    async def main():
+        job = await job_service.enqueue(REQUEST)
+        await job_service.update_job(job["job_id"], status="failed", error="boom")
+        request = Request({"type": "http", "method": "GET", "headers": []})
+        response = await routes.stream_animation_job_events(job["job_id"], request)
+        return [chunk async for chunk in response.body_iterator]
+
+    chunks = asyncio.run(main())
+    assert chunks[-1].startswith("event: failed\n")
+    assert '"error": "boom"' in chunks[-1]
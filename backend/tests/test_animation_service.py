@@ -0,0 +1,37 @@
+import asyncio
+import fakeredis
+from app.core.database import Base, SessionLocal, engine
+from app.models.animation import AnimationRequest
+from app.services.animation_service import AnimationService
+from app.services.stats_service import stats_service
+
+DESCRIPTION = "a square turning into a circle"
+
+def test_each_quality_of_a_description_keeps_its_own_url(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(stats_service, "redis", fakeredis.aioredis.FakeRedis(server=server))
+    service = AnimationService()
+    service.cache_service.redis = fakeredis.aioredis.FakeRedis(server=server)
+
+    async def main():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        async with SessionLocal() as db:
+            for quality in ("low", "high"):
+                animation = await service.create_animation(
+                    db, AnimationRequest(description=DESCRIPTION, quality=quality), manim_code="code"
+                )
+                await service.update_animation(db, animation.id, f"/storage/animations/{quality}.mp4", quality)
+        return (
+            await service.get_cached_animation(DESCRIPTION, "low"),
+            await service.get_cached_animation(DESCRIPTION, "high"),
+            await service.get_cached_animation(DESCRIPTION, "medium")
+        )
+
+    low, high, medium = asyncio.run(main())
+    assert low.id != high.id
+    assert (low.quality, low.animation_url) == ("low", "/storage/animations/low.mp4")
+    assert (high.quality, high.animation_url) == ("high", "/storage/animations/high.mp4")
+    # Another quality's animation still lends its scene code
+    assert medium.manim_code == "code"
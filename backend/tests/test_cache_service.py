@@ -0,0 +1,82 @@
+import asyncio
+import fakeredis
+from app.services.cache_service import CacheService
+
+def make_cache() -> CacheService:
+    cache = CacheService()
+    cache.redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    return cache
+
+def test_concurrent_misses_compute_once():
+    calls = 0
+
+    async def getter():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"value": 42}
+
+    async def main():
+        cache = make_cache()
+        results = await asyncio.gather(*(cache.get_or_set("key", getter) for _ in range(10)))
+        # Later callers are served from the cache without recomputing
+        cached = await cache.get_or_set("key", getter)
+        return results, cached
+
+    results, cached = asyncio.run(main())
+    assert calls == 1
+    assert results == [{"value": 42}] * 10
+    assert cached == {"value": 42}
+
+def test_waiters_share_the_leaders_error():
+    calls = 0
+
+    async def getter():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        raise RuntimeError("boom")
+
+    async def main():
+        cache = make_cache()
+        return await asyncio.gather(
+            *(cache.get_or_set("key", getter) for _ in range(5)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_lease_holder_in_another_process_is_waited_for():
+    calls = 0
+
+    async def getter():
+        nonlocal calls
+        calls += 1
+        return "ours"
+
+    async def main():
+        cache = make_cache()
+        # Another process holds the lease and publishes its value shortly after
+        await cache.redis.set("lock:key", "other-token", ex=30)
+
+        async def other_leader():
+            await asyncio.sleep(0.1)
+            await cache.set("key", "theirs")
+
+        leader = asyncio.create_task(other_leader())
+        value = await cache.get_or_set("key", getter)
+        await leader
+        return value
+
+    assert asyncio.run(main()) == "theirs"
+    assert calls == 0
+
+def test_mget_mset_round_trip():
+    async def main():
+        cache = make_cache()
+        await cache.mset({"a": [1, "x"], "b": {"k": "v"}}, expire=60)
+        return await cache.mget(["a", "missing", "b"])
+
+    assert asyncio.run(main()) == [[1, "x"], None, {"k": "v"}]
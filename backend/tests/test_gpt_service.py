@@ -0,0 +1,58 @@
+import asyncio
+import httpx
+from openai import AsyncOpenAI
+from app.core.config import settings
+from app.services.gpt_service import GPTService
+from tests.fake_openai_server import create_app
+
+def make_service(fake_app) -> GPTService:
+    service = GPTService()
+    service.client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://fake/v1",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_app)),
+        max_retries=0
+    )
+    return service
+
+def test_generate_manim_code_against_fake_server():
+    fake_app = create_app(latency=0)
+    code = asyncio.run(make_service(fake_app).generate_manim_code("a square turning into a circle"))
+
+    assert "class SquareToCircle(Scene)" in code
+    assert fake_app.state.requests == 1
+
+def test_generate_manim_code_retries_server_errors(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_RETRY_BASE_DELAY", 0.0)
+    fake_app = create_app(latency=0, failures=2)
+    code = asyncio.run(make_service(fake_app).generate_manim_code("a square", max_retries=3))
+
+    assert "class SquareToCircle(Scene)" in code
+    assert fake_app.state.requests == 3
+
+def test_concurrent_calls_respect_the_concurrency_cap(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_MAX_CONCURRENT_REQUESTS", 2)
+    fake_app = create_app(latency=0.05)
+
+    in_flight = 0
+    peak = 0
+
+    async def main():
+        service = make_service(fake_app)
+        create = service.client.chat.completions.create
+
+        async def tracked_create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                return await create(**kwargs)
+            finally:
+                in_flight -= 1
+
+        service.client.chat.completions.create = tracked_create
+        await asyncio.gather(*(service.generate_manim_code(f"scene {i}") for i in range(6)))
+
+    asyncio.run(main())
+    assert fake_app.state.requests == 6
+    assert peak == 2
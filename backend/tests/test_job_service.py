@@ -0,0 +1,80 @@
+import asyncio
+import fakeredis
+from app.models.animation import AnimationRequest
+from app.services.job_service import JobService
+
+def make_service() -> JobService:
+    service = JobService()
+    service.redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    return service
+
+REQUEST = AnimationRequest(description="a square turning into a circle", quality="medium")
+
+def test_identical_requests_share_one_job():
+    async def main():
+        service = make_service()
+        jobs = await asyncio.gather(*(service.enqueue(REQUEST) for _ in range(5)))
+        return jobs, await service.redis.llen(service.queue_name)
+
+    jobs, queued = asyncio.run(main())
+    assert len({job["job_id"] for job in jobs}) == 1
+    assert queued == 1
+
+def test_concurrent_requests_take_over_a_finished_job_once():
+    async def main():
+        service = make_service()
+        finished = await service.enqueue(REQUEST)
+        await service.update_job(finished["job_id"], status="completed")
+
+        jobs = await asyncio.gather(*(service.enqueue(REQUEST) for _ in range(5)))
+        return finished, jobs, await service.redis.llen(service.queue_name)
+
+    finished, jobs, queued = asyncio.run(main())
+    job_ids = {job["job_id"] for job in jobs}
+    assert len(job_ids) == 1
+    assert finished["job_id"] not in job_ids
+    assert queued == 2
+
+def test_dequeued_jobs_stay_on_the_processing_list_until_acked():
+    async def main():
+        service = make_service()
+        job = await service.enqueue(REQUEST)
+        dequeued = await service.dequeue(timeout=1)
+        processing = await service.redis.lrange(service.processing_name, 0, -1)
+        await service.ack_job(job["job_id"])
+        return job, dequeued, processing, await service.redis.llen(service.processing_name)
+
+    job, dequeued, processing, remaining = asyncio.run(main())
+    assert dequeued["job_id"] == job["job_id"]
+    assert processing == [job["job_id"].encode()]
+    assert remaining == 0
+
+def test_abandoned_jobs_are_requeued_then_failed():
+    async def main():
+        service = make_service()
+        job = await service.enqueue(REQUEST)
+        job_id = job["job_id"]
+        states = []
+        for attempt in range(1, 3):
+            await service.dequeue(timeout=1)
+            await service.update_job(job_id, status="running", attempts=attempt)
+            # The worker dies: its heartbeat lapses
+            await service.redis.delete(service._heartbeat_key(job_id), f"job_reap:{job_id}")
+            # Only reaped once seen without a heartbeat twice in a row
+            await service.reap_abandoned_jobs()
+            states.append((await service.get_job(job_id))["status"])
+            await service.reap_abandoned_jobs()
+            states.append((await service.get_job(job_id))["status"])
+        return (
+            states,
+            await service.redis.llen(service.queue_name),
+            await service.redis.llen(service.processing_name),
+            await service.redis.get(job["dedupe_key"])
+        )
+
+    states, queued, processing, lease = asyncio.run(main())
+    assert states == ["running", "queued", "running", "failed"]
+    assert queued == 0
+    assert processing == 0
+    # New identical requests start a fresh job instead of joining the dead one
+    assert lease is None
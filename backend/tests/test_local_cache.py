@@ -0,0 +1,44 @@
+import time
+from app.services.local_cache import LocalCache
+
+def test_evicts_least_recently_used_once_over_max_bytes():
+    cache = LocalCache(max_bytes=10, default_ttl=60)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == b"1234"
+    cache.set("c", b"1234")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234"
+    assert cache.get("c") == b"1234"
+    assert cache.size_bytes == 8
+    assert cache.evictions == 1
+
+def test_entries_expire_after_their_ttl():
+    cache = LocalCache(max_bytes=100, default_ttl=60)
+    cache.set("short", b"x", ttl=0.05)
+    cache.set("long", b"y")
+    time.sleep(0.1)
+
+    assert cache.get("short") is None
+    assert cache.get("long") == b"y"
+    assert cache.size_bytes == 1
+
+def test_values_larger_than_the_cache_are_not_kept():
+    cache = LocalCache(max_bytes=4, default_ttl=60)
+    cache.set("small", b"12")
+    cache.set("big", b"12345")
+
+    assert cache.get("big") is None
+    assert cache.get("small") == b"12"
+
+def test_overwrite_and_delete_keep_the_size_in_step():
+    cache = LocalCache(max_bytes=100, default_ttl=60)
+    cache.set("a", b"1234")
+    cache.set("a", b"12")
+    assert cache.size_bytes == 2
+    cache.delete("a")
+    assert cache.size_bytes == 0
+    stats = cache.get_stats()
+    assert stats["entries"] == 0
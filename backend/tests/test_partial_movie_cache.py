@@ -0,0 +1,47 @@
+import asyncio
+import os
+import fakeredis
+from app.services.partial_movie_cache import PartialMovieCache
+
+SCENE = """
+from manim import *
+
+class MainScene(Scene):
+    def construct(self):
+        square = Square()
+        self.play(Create(square))
+        self.play(Transform(square, Circle()))
+        self.wait()
+"""
+
+def test_lineage_survives_edits_later_in_the_scene():
+    cache = PartialMovieCache()
+    edited = SCENE.replace("self.wait()", "self.wait(2)")
+    assert cache.get_lineage(SCENE, "MainScene") == cache.get_lineage(edited, "MainScene")
+
+def test_unrelated_scenes_with_the_same_class_name_get_their_own_lineage():
+    cache = PartialMovieCache()
+    other = SCENE.replace("Square()", "Triangle()")
+    assert cache.get_lineage(SCENE, "MainScene") != cache.get_lineage(other, "MainScene")
+    assert cache.get_lineage(SCENE, "MainScene").startswith("MainScene_")
+
+def test_evicts_least_recently_used_segments_across_lineages(tmp_path):
+    cache = PartialMovieCache()
+    cache.redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    cache.cache_path = str(tmp_path)
+    cache.max_bytes = 250
+    for age, (lineage, name) in enumerate([("b", "new"), ("a", "mid"), ("a", "old")]):
+        os.makedirs(tmp_path / lineage, exist_ok=True)
+        path = tmp_path / lineage / f"{name}.mp4"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 - age, 1000 - age))
+
+    async def main():
+        await cache.evict()
+        return await cache.get_stats()
+
+    stats = asyncio.run(main())
+    assert sorted(p.name for p in tmp_path.glob("*/*.mp4")) == ["mid.mp4", "new.mp4"]
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+    assert stats["total_bytes"] == 200
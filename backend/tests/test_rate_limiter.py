@@ -0,0 +1,64 @@
+import asyncio
+import fakeredis
+import pytest
+from app.core.rate_limiter import MemoryBackend, RateLimiter, RedisBackend
+
+def make_redis_backend() -> RedisBackend:
+    backend = RedisBackend()
+    backend.redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    return backend
+
+@pytest.mark.parametrize("make_backend", [MemoryBackend, make_redis_backend])
+def test_gcra_allows_burst_then_limits(make_backend):
+    # 60 requests per minute, bursts of up to 5
+    emission_interval, tolerance = 1.0, 5.0
+
+    async def main():
+        backend = make_backend()
+        return [await backend.acquire("client", emission_interval, tolerance, 1) for _ in range(6)]
+
+    results = asyncio.run(main())
+    assert [result.allowed for result in results] == [True] * 5 + [False]
+    assert [result.remaining for result in results[:5]] == [4, 3, 2, 1, 0]
+    # The next unit frees up one emission interval later
+    assert 0 < results[5].retry_after <= emission_interval
+
+@pytest.mark.parametrize("make_backend", [MemoryBackend, make_redis_backend])
+def test_gcra_costs_spend_several_units(make_backend):
+    async def main():
+        backend = make_backend()
+        first = await backend.acquire("client", 1.0, 5.0, 4)
+        second = await backend.acquire("client", 1.0, 5.0, 4)
+        third = await backend.acquire("client", 1.0, 5.0, 1)
+        return first, second, third
+
+    first, second, third = asyncio.run(main())
+    assert first.allowed and first.remaining == 1
+    assert not second.allowed
+    # A denied request doesn't spend anything
+    assert third.allowed and third.remaining == 0
+
+def test_keys_are_limited_independently():
+    async def main():
+        backend = MemoryBackend()
+        await backend.acquire("a", 1.0, 1.0, 1)
+        return await backend.acquire("a", 1.0, 1.0, 1), await backend.acquire("b", 1.0, 1.0, 1)
+
+    a, b = asyncio.run(main())
+    assert not a.allowed
+    assert b.allowed
+
+def test_route_costs_match_longest_prefix():
+    limiter = RateLimiter(backend="memory")
+    limiter.route_costs = [["POST", "/api/v1/animations/jobs", 2], ["POST", "/api/v1/animations", 20]]
+
+    assert limiter.get_cost("POST", "/api/v1/animations/") == 20
+    assert limiter.get_cost("POST", "/api/v1/animations/jobs") == 2
+    assert limiter.get_cost("GET", "/api/v1/animations") == 1
+
+def test_buckets_smaller_than_a_route_cost_are_rejected():
+    limiter = RateLimiter(backend="memory")
+    with pytest.raises(ValueError):
+        RateLimiter(burst=limiter.max_cost - 1, backend="memory")
+    with pytest.raises(ValueError):
+        asyncio.run(limiter.acquire("client", burst=5, cost=6))
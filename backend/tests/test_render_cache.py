@@ -0,0 +1,70 @@
+import asyncio
+import fakeredis
+from app.services.render_cache import render_cache
+
+SCENE = '''from manim import *
+
+class SquareToCircle(Scene):
+    def construct(self):
+        square = Square()
+        self.play(Create(square))
+        self.play(Transform(square, Circle()))
+'''
+
+REFORMATTED = '''from manim import *
+
+
+class MyScene( Scene ):
+    """Turns a square into a circle."""
+    def construct(self):
+        # Start with a square
+        square = Square( )
+        self.play(Create(square))
+
+        self.play(Transform(square, Circle()))
+'''
+
+def test_render_key_ignores_formatting_comments_docstrings_and_class_name():
+    assert render_cache.get_render_key(SCENE, "medium") == render_cache.get_render_key(REFORMATTED, "medium")
+
+def test_render_key_depends_on_quality():
+    assert render_cache.get_render_key(SCENE, "low") != render_cache.get_render_key(SCENE, "high")
+
+def test_render_key_depends_on_what_is_drawn():
+    edited = SCENE.replace("Circle()", "Triangle()")
+    assert render_cache.get_render_key(SCENE, "medium") != render_cache.get_render_key(edited, "medium")
+
+def test_scene_key_is_quality_independent():
+    assert render_cache.get_scene_key(SCENE) == render_cache.get_scene_key(REFORMATTED)
+    assert render_cache.get_scene_key(SCENE) != render_cache.get_render_key(SCENE, "medium")
+
+def test_stream_key_depends_on_the_top_quality():
+    # A scene first packaged at "low" is packaged again with the full ladder
+    assert render_cache.get_stream_key(SCENE, "low") != render_cache.get_stream_key(SCENE, "high")
+    assert render_cache.get_stream_key(SCENE, "high") == render_cache.get_stream_key(REFORMATTED, "high")
+    assert render_cache.get_stream_key(SCENE, "high") != render_cache.get_render_key(SCENE, "high")
+
+def test_invalid_code_falls_back_to_its_text():
+    assert render_cache.normalize_code("class (:\n") == "class (:"
+
+def test_contains_leaves_stats_and_recency_alone(monkeypatch, tmp_path):
+    monkeypatch.setattr(render_cache, "redis", fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer()))
+    monkeypatch.setattr(render_cache, "cache_path", str(tmp_path))
+    key = render_cache.get_render_key(SCENE, "medium")
+    (tmp_path / f"{key}.mp4").write_bytes(b"video")
+
+    async def main():
+        await render_cache.redis.zadd(render_cache.LRU_KEY, {key: 1})
+        found = await render_cache.contains(key)
+        missing = await render_cache.contains(render_cache.get_render_key(SCENE, "low"))
+        return (
+            found,
+            missing,
+            await render_cache.redis.zscore(render_cache.LRU_KEY, key),
+            await render_cache.redis.hgetall(render_cache.STATS_KEY)
+        )
+
+    found, missing, score, stats = asyncio.run(main())
+    assert found and not missing
+    assert score == 1
+    assert stats == {}
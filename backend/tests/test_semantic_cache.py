@@ -0,0 +1,51 @@
+import asyncio
+import fakeredis
+import pytest
+from app.core.config import settings
+from app.services.semantic_cache import SemanticCache
+
+@pytest.fixture(autouse=True)
+def enable_semantic_cache(monkeypatch):
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_EMBEDDER", "hashing")
+
+def make_cache(server: fakeredis.FakeServer) -> SemanticCache:
+    cache = SemanticCache()
+    cache.redis = fakeredis.aioredis.FakeRedis(server=server)
+    return cache
+
+def test_paraphrase_hits_and_reversal_misses():
+    async def main():
+        cache = make_cache(fakeredis.FakeServer())
+        await cache.add("Animate a square turning into a circle", 1)
+        return (
+            await cache.lookup("square transforms into circle"),
+            await cache.lookup("Animate a circle turning into a square")
+        )
+
+    paraphrase, reversal = asyncio.run(main())
+    assert paraphrase == 1
+    assert reversal is None
+
+def test_entries_are_capped_across_processes():
+    async def main():
+        server = fakeredis.FakeServer()
+        writer = make_cache(server)
+        reader = make_cache(server)
+        writer.max_entries = reader.max_entries = 3
+        await writer.add("Draw a sine wave", 1)
+        await reader.lookup("Draw a sine wave")
+        for animation_id, shape in enumerate(["triangle", "hexagon", "star", "arrow"], start=2):
+            await writer.add(f"Rotate a {shape}", animation_id)
+        return (
+            await reader.lookup("Draw a sine wave"),
+            await reader.lookup("Rotate a star"),
+            await writer.redis.llen(writer.ENTRIES_KEY),
+            reader._index.ids
+        )
+
+    evicted, kept, length, ids = asyncio.run(main())
+    assert evicted is None
+    assert kept == 4
+    assert length == 3
+    assert ids == [3, 4, 5]
@@ -0,0 +1,32 @@
+import asyncio
+import fakeredis
+from app.services.stats_service import StatsService
+
+def make_stats(server: fakeredis.FakeServer) -> StatsService:
+    stats = StatsService()
+    stats.redis = fakeredis.aioredis.FakeRedis(server=server)
+    return stats
+
+def test_rows_created_while_seeding_are_kept():
+    async def main():
+        stats = make_stats(fakeredis.FakeServer())
+        # Not seeded and nobody counting: the next seed's count includes it
+        await stats.record_created("low")
+        token = await stats.begin_seed()
+        # A second process sees the seed in progress and does not start another
+        second = await stats.begin_seed()
+        # Committed after the count started, so the count below misses them
+        await stats.record_created("high")
+        await stats.record_quality_change("low", "high")
+        await stats.finish_seed(token, 1, {"low": 1})
+        await stats.record_created("low")
+        return second, await stats.get_counts()
+
+    second, counts = asyncio.run(main())
+    assert second is None
+    assert counts == {"total_count": 3, "quality_distribution": {"low": 1, "high": 2}}
+
+def test_get_counts_returns_none_when_redis_is_down():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    assert asyncio.run(make_stats(server).get_counts()) is None
@@ -3,17 +3,82 @@ import { Header } from './components/Header';
 import MainContent from './components/MainContent';
 import { ErrorMessage } from './components/common/ErrorMessage';
 
+// Give up on a job that hasn't finished after this long, e.g. if its worker died
+const POLL_DEADLINE_MS = 15 * 60 * 1000;
+
 export const App: React.FC = () => {
   const [globalError, setGlobalError] = useState<string | null>(null);
 
-  const handleAnimationCreate = async (description: string): Promise<string> => {
+  const pollForAnimation = async (
+    statusUrl: string,
+    onPreview: (url: string) => void
+  ): Promise<string> => {
+    let previewShown = false;
+    const deadline = Date.now() + POLL_DEADLINE_MS;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+
+      const response = await fetch(`http://localhost:8000${statusUrl}`);
+      if (!response.ok) {
+        throw new Error('Failed to fetch animation status');
+      }
+
+      const job = await response.json();
+      if (job.status === 'completed') {
+        return `http://localhost:8000${job.result.animation_url}`;
+      }
+      if (job.status === 'preview_ready' && !previewShown) {
+        previewShown = true;
+        onPreview(`http://localhost:8000${job.preview_url}`);
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Failed to create animation');
+      }
+    }
+    throw new Error('Timed out waiting for the animation');
+  };
+
+  // Follow the job's progress events, falling back to polling if the stream fails.
+  // A low-quality preview may be published before the full render finishes
+  const waitForAnimation = (
+    eventsUrl: string,
+    statusUrl: string,
+    onPreview: (url: string) => void
+  ): Promise<string> =>
+    new Promise((resolve, reject) => {
+      const source = new EventSource(`http://localhost:8000${eventsUrl}`);
+      source.addEventListener('preview_ready', (event) => {
+        const { preview_url } = JSON.parse((event as MessageEvent).data);
+        onPreview(`http://localhost:8000${preview_url}`);
+      });
+      source.addEventListener('completed', (event) => {
+        source.close();
+        const { result } = JSON.parse((event as MessageEvent).data);
+        resolve(`http://localhost:8000${result.animation_url}`);
+      });
+      source.addEventListener('failed', (event) => {
+        source.close();
+        const { error } = JSON.parse((event as MessageEvent).data);
+        reject(new Error(error || 'Failed to create animation'));
+      });
+      source.onerror = () => {
+        source.close();
+        pollForAnimation(statusUrl, onPreview).then(resolve, reject);
+      };
+    });
+
+  const handleAnimationCreate = async (
+    description: string,
+    quality: string,
+    onPreview: (url: string) => void
+  ): Promise<string> => {
     try {
       const response = await fetch('http://localhost:8000/api/v1/animations', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ description }),
+        body: JSON.stringify({ description, quality }),
       });
       
       if (!response.ok) {
@@ -21,8 +86,8 @@ export const App: React.FC = () => {
         throw new Error(errorData.detail || 'Failed to create animation');
       }
       
-      const data = await response.json();
-      return `http://localhost:8000${data.animation_url}`;
+      const job = await response.json();
+      return await waitForAnimation(job.events_url, job.status_url, onPreview);
     } catch (error) {
       setGlobalError(error instanceof Error ? error.message : 'An unexpected error occurred');
       throw error;
@@ -5,7 +5,11 @@ import { LoadingOverlay } from '../LoadingOverlay';
 import { Tooltip } from '../common/Tooltip';
 
 interface MainContentProps {
-  onGenerateAnimation: (description: string, quality: string) => Promise<string>;
+  onGenerateAnimation: (
+    description: string,
+    quality: string,
+    onPreview: (url: string) => void
+  ) => Promise<string>;
 }
 
 interface ExampleConcept {
@@ -70,8 +74,10 @@ export const MainContent: React.FC<MainContentProps> = ({ onGenerateAnimation })
   const handleSubmit = async () => {
     setIsLoading(true);
     setError(null);
+    setAnimationUrl(null);
     try {
-      const url = await onGenerateAnimation(description, selectedQuality);
+      // Show the preview while the full render finishes, then swap it out
+      const url = await onGenerateAnimation(description, selectedQuality, setAnimationUrl);
       setAnimationUrl(url);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to generate animation');
@@ -203,7 +209,7 @@ export const MainContent: React.FC<MainContentProps> = ({ onGenerateAnimation })
       )}
 
       {/* Loading Overlay */}
-      {isLoading && <LoadingOverlay />}
+      {isLoading && !animationUrl && <LoadingOverlay />}
     </div>
   );
 };